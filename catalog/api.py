@@ -0,0 +1,140 @@
+import hashlib
+from datetime import datetime, time
+
+from django.db.models import Q
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils import timezone
+
+from reports.pagination import decode_cursor, encode_cursor
+from sales.models import Product
+from sales.pos_catalog import FEED_LOOKBACK
+from sales.thumbnails import thumbnail_url
+
+# Public field name -> the .values() columns it is built from. Cost and
+# other internal columns are deliberately absent.
+API_FIELDS = {
+    'id': ('id',),
+    'name': ('name',),
+    'category': ('category__name',),
+    'price': ('price',),
+    'price_usd': ('price_usd',),
+    'stock': ('stock',),
+    'barcode': ('barcode',),
+    'image_url': ('image', 'thumbnails_source'),
+    'last_updated': ('last_updated',),
+}
+DEFAULT_FIELDS = tuple(API_FIELDS)
+# Image size served to integrations; see sales/thumbnails.py.
+API_THUMBNAIL_SIZE = 'lg'
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+
+class ApiParamError(ValueError):
+    """Raised for a query parameter the API cannot honour; shown to the client."""
+
+
+def parse_fields(value):
+    """Requested field names, in API order; all fields when none are given."""
+    if not value:
+        return DEFAULT_FIELDS
+    requested = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = requested - API_FIELDS.keys()
+    if unknown:
+        raise ApiParamError(f"Campos desconocidos: {', '.join(sorted(unknown))}.")
+    return tuple(name for name in API_FIELDS if name in requested)
+
+
+def parse_updated_since(value):
+    """Aware datetime from an ISO 8601 date or datetime, or None if not given."""
+    if not value:
+        return None
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError(value)
+            moment = datetime.combine(day, time.min)
+    except ValueError:
+        raise ApiParamError('updated_since debe ser una fecha ISO 8601.')
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def parse_limit(value):
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_LIMIT
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def api_etag(version, in_stock, params):
+    """ETag of one API page: the catalog version plus the normalized query."""
+    digest = hashlib.md5(repr(sorted(params.items())).encode()).hexdigest()
+    return f'"{version}-{in_stock}-{digest}"'
+
+
+def product_page(fields, updated_since=None, cursor=None, resume=None, limit=DEFAULT_LIMIT, build_url=str):
+    """
+    One page of products as plain dicts, oldest change first.
+
+    Rows come from .values() with only the columns behind `fields`, and are
+    paged by keyset on (last_updated, id): every page is an index range scan
+    from `cursor`. `build_url` turns a media path into the absolute URL
+    clients receive.
+
+    last_updated is stamped when a row is written, not when its transaction
+    commits, so a sync that starts from `updated_since` or from the
+    `resume` cursor of an earlier sync goes back FEED_LOOKBACK to pick up
+    rows that committed late. Rows in that window are sent again; clients
+    upsert them by id.
+
+    Returns (results, next_cursor, resume_cursor). next_cursor is None on
+    the last page; resume_cursor is where the next sync starts from.
+    """
+    columns = {'id', 'last_updated'}
+    for name in fields:
+        columns.update(API_FIELDS[name])
+
+    products = Product.objects.all()
+    if updated_since is not None:
+        products = products.filter(last_updated__gte=updated_since - FEED_LOOKBACK)
+    resume_position = decode_cursor(resume)
+    if resume_position:
+        products = products.filter(last_updated__gte=resume_position[0] - FEED_LOOKBACK)
+    position = decode_cursor(cursor)
+    if position:
+        last_updated, pk = position
+        # The OR cannot bound an index scan; the redundant
+        # last_updated bound is what starts the scan at the cursor.
+        products = (
+            products.filter(last_updated__gte=last_updated)
+            .filter(Q(last_updated__gt=last_updated) | Q(last_updated=last_updated, pk__gt=pk))
+        )
+    rows = list(products.order_by('last_updated', 'pk').values(*columns)[:limit + 1])
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['last_updated'], rows[-1]['id'])
+    if rows:
+        resume_cursor = encode_cursor(rows[-1]['last_updated'], rows[-1]['id'])
+    else:
+        # Nothing newer: resume from the same point next time.
+        resume_cursor = cursor if position else resume if resume_position else None
+
+    results = []
+    for row in rows:
+        item = {}
+        for name in fields:
+            if name == 'image_url':
+                url = thumbnail_url(row['image'], row['thumbnails_source'], API_THUMBNAIL_SIZE)
+                item[name] = build_url(url) if url else None
+            else:
+                item[name] = row[API_FIELDS[name][0]]
+        results.append(item)
+    return results, next_cursor, resume_cursor
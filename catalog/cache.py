@@ -0,0 +1,66 @@
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from sales.models import Product
+from sales.pos_catalog import catalog_generation
+
+CACHE_PREFIX = 'catalog'
+PAGE_TIMEOUT = 10 * 60
+# How long browsers and shared proxies may reuse a page before revalidating
+# it with its ETag.
+PAGE_MAX_AGE = 60
+
+
+def normalize_page_params(page, query, category):
+    """
+    The page number, search text and category id exactly as they affect the
+    rendered page. An unreadable category id means no category filter.
+    """
+    try:
+        category = int(category)
+    except (TypeError, ValueError):
+        category = None
+    return (page or '1').strip(), ' '.join((query or '').split()), category
+
+
+def page_version(page, query, category):
+    """
+    (cache key, ETag) of an anonymous catalog page.
+
+    Both include the catalog generation, which every product, stock,
+    category and price change bumps, so neither needs to be invalidated
+    explicitly and a matching If-None-Match can be answered without
+    touching the database.
+    """
+    digest = hashlib.md5(f'{page}\n{query}\n{category}'.encode()).hexdigest()
+    generation = catalog_generation()
+    return f'{CACHE_PREFIX}:page:{generation}:{digest}', f'"{generation}-{digest}"'
+
+
+def cached_page(key, render):
+    """Rendered page content for `key`, calling render() on a miss."""
+    content = cache.get(key)
+    if content is None:
+        content = render()
+        cache.set(key, content, PAGE_TIMEOUT)
+    return content
+
+
+def category_facets():
+    """
+    Categories with in-stock products and their product counts, from one
+    grouped query, computed once per catalog generation.
+    """
+    key = f'{CACHE_PREFIX}:facets:{catalog_generation()}'
+    facets = cache.get(key)
+    if facets is None:
+        facets = list(
+            Product.objects.filter(stock__gt=0, category__isnull=False)
+            .values('category_id', 'category__name')
+            .annotate(count=Count('id'))
+            .order_by('category__name')
+        )
+        cache.set(key, facets, PAGE_TIMEOUT)
+    return facets
@@ -0,0 +1,61 @@
+import re
+
+from django.contrib.postgres.lookups import TrigramWordSimilar
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity,
+)
+from django.db.models import F, Q
+from django.db.models.functions import Upper
+
+from sales.models import SEARCH_CONFIG, Category
+
+WORD_RE = re.compile(r'[^\W_]+')
+
+
+def catalog_query(term):
+    """
+    Prefix tsquery for every word of `term`, so 'galle choc' finds
+    'Galletas de chocolate' while the shopper is still typing.
+
+    Returns None when the term has no searchable words.
+    """
+    words = WORD_RE.findall(term)
+    if not words:
+        return None
+    return SearchQuery(' & '.join(f'{word}:*' for word in words), config=SEARCH_CONFIG, search_type='raw')
+
+
+def search_catalog(products, term):
+    """
+    Narrow `products` to those matching `term`, best match first.
+
+    Products match on the full-text vector (Spanish stems, accents folded),
+    on trigram word similarity of the name, which absorbs typos, or through
+    a category whose name matches. The first two are served by the GIN
+    indexes on search_vector and UPPER(name); categories are few and are
+    resolved to ids up front, so the filter stays a bitmap OR of index scans
+    instead of a join.
+    """
+    term = term.strip()
+    query = catalog_query(term)
+    if query is None:
+        return products.none()
+
+    category_ids = list(
+        Category.objects.annotate(document=SearchVector('name', config=SEARCH_CONFIG))
+        .filter(document=query)
+        .values_list('pk', flat=True)
+    )
+
+    matches = Q(search_vector=query) | TrigramWordSimilar(Upper('name'), term.upper())
+    if category_ids:
+        matches |= Q(category_id__in=category_ids)
+
+    return (
+        products.filter(matches)
+        .annotate(rank=(
+            SearchRank(F('search_vector'), query)
+            + TrigramWordSimilarity(term.upper(), Upper('name'))
+        ))
+        .order_by('-rank', 'name', 'pk')
+    )
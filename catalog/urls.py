@@ -5,4 +5,5 @@ urlpatterns = [
     path('', views.CatalogListView.as_view(), name='catalog_home'),
     path('about/', views.about, name='about'),
     path('contact/', views.contact, name='contact'),
+    path('api/products/', views.product_api, name='catalog_product_api'),
 ]
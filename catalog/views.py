@@ -1,20 +1,113 @@
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.utils.http import parse_etags, urlencode
+from django.views.decorators.http import require_GET
 from django.views.generic import ListView
 from sales.models import Product
+from sales.pos_catalog import cached_catalog_state
+from .api import ApiParamError, api_etag, parse_fields, parse_limit, parse_updated_since, product_page
+from .cache import PAGE_MAX_AGE, cached_page, category_facets, normalize_page_params, page_version
+from .search import search_catalog
 
 class CatalogListView(ListView):
     model = Product
     template_name = 'catalog/product_list.html'
     context_object_name = 'products'
     ordering = ['name']
+    paginate_by = 24
 
     def get_queryset(self):
-        queryset = Product.objects.filter(stock__gt=0).order_by('name')
-        query = self.request.GET.get('q')
-        if query:
-            queryset = queryset.filter(name__icontains=query) | queryset.filter(category__name__icontains=query)
-            queryset = queryset.distinct()
+        queryset = Product.objects.filter(stock__gt=0).select_related('category').order_by('name', 'pk')
+        if self.category is not None:
+            # Served by the (category, stock) index.
+            queryset = queryset.filter(category_id=self.category)
+        if self.query:
+            queryset = search_catalog(queryset, self.query)
         return queryset
 
+    def get(self, request, *args, **kwargs):
+        page, self.query, self.category = normalize_page_params(
+            request.GET.get('page'), request.GET.get('q'), request.GET.get('category'),
+        )
+        if request.user.is_authenticated:
+            response = super().get(request, *args, **kwargs)
+            response['Cache-Control'] = 'private, no-cache'
+            return response
+
+        # Anonymous visitors all get the same HTML for a page and filters, so
+        # it is rendered once per catalog version and shared.
+        key, etag = page_version(page, self.query, self.category)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(cached_page(key, lambda: self.render_page(request, *args, **kwargs)))
+        response['ETag'] = etag
+        response['Cache-Control'] = f'public, max-age={PAGE_MAX_AGE}'
+        return response
+
+    def render_page(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        return response.render().content
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.query
+        context['current_category'] = self.category
+        context['category_facets'] = category_facets()
+        # Facet links keep the search text; pagination links keep both filters.
+        context['facet_query'] = urlencode({'q': self.query}) if self.query else ''
+        filters = {'q': self.query, 'category': self.category}
+        context['filter_query'] = urlencode({name: value for name, value in filters.items() if value not in ('', None)})
+        return context
+
+@require_GET
+def product_api(request):
+    """
+    Public, read-only product feed for integrations.
+
+    ?fields= picks the fields to return, ?updated_since= (ISO 8601) limits
+    the feed to products changed since then, and ?cursor= continues from the
+    `next` link of the previous page. Every page carries a `resume_cursor`;
+    passing the last one as ?resume= starts the next incremental sync.
+    Unchanged pages answer If-None-Match with 304.
+    """
+    try:
+        fields = parse_fields(request.GET.get('fields'))
+        updated_since = parse_updated_since(request.GET.get('updated_since'))
+    except ApiParamError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    limit = parse_limit(request.GET.get('limit'))
+    cursor = request.GET.get('cursor')
+    resume = request.GET.get('resume')
+
+    version, in_stock = cached_catalog_state()
+    etag = api_etag(version, in_stock, {
+        'fields': ','.join(fields),
+        'updated_since': updated_since.isoformat() if updated_since else '',
+        'cursor': cursor or '',
+        'resume': resume or '',
+        'limit': limit,
+    })
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        results, next_cursor, resume_cursor = product_page(
+            fields, updated_since, cursor, resume, limit, request.build_absolute_uri)
+        next_url = None
+        if next_cursor:
+            query = request.GET.copy()
+            query['cursor'] = next_cursor
+            next_url = request.build_absolute_uri(f'?{query.urlencode()}')
+        response = JsonResponse({
+            'version': version,
+            'results': results,
+            'next': next_url,
+            'next_cursor': next_cursor,
+            'resume_cursor': resume_cursor,
+        })
+    response['ETag'] = etag
+    response['Cache-Control'] = 'public, no-cache'
+    return response
+
 def about(request):
     from django.shortcuts import render
     return render(request, 'catalog/about.html')
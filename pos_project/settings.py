@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'users',
     'sales',
     'purchases',
@@ -67,6 +68,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'django.template.context_processors.media',
+                'users.context_processors.roles',
             ],
         },
     },
@@ -90,6 +92,18 @@ DATABASES = {
 }
 
 
+# Cache
+# The POS catalog payload and counters live here. Local memory is per
+# process; point this at Redis or Memcached to share it across workers.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'pos2026',
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -130,3 +144,17 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'login'
+
+# Receipt numbering: default register prefix, and how many numbers each
+# worker process reserves from the counter at a time.
+RECEIPT_DEFAULT_PREFIX = 'REC'
+RECEIPT_BLOCK_SIZE = 20
+
+# Hours a POS idempotency key keeps replaying its original sale.
+SALE_IDEMPOTENCY_TTL_HOURS = 24
+
+# Background threads per process running uploaded product imports.
+PRODUCT_IMPORT_WORKERS = 2
+
+# Background threads per process generating product image thumbnails.
+THUMBNAIL_WORKERS = 2
@@ -0,0 +1,68 @@
+from django.core.cache import cache
+from django.utils import timezone
+
+from sales.cache import bump, count, generation
+
+CACHE_PREFIX = 'reports'
+# Bumped by every committed sale or cash transaction; only ranges that reach
+# the present are keyed by it.
+GENERATION_KEY = f'{CACHE_PREFIX}:generation'
+# Bumped when past data changes (edits, deletions, rollup rebuilds); every
+# entry is keyed by it.
+HISTORY_KEY = f'{CACHE_PREFIX}:history'
+OPEN_RANGE_TIMEOUT = 10 * 60
+CLOSED_RANGE_TIMEOUT = 24 * 60 * 60
+
+
+def invalidate_reports(history=False):
+    """Drop cached reports that include today, or all of them with history=True."""
+    bump(HISTORY_KEY if history else GENERATION_KEY)
+
+
+def cached_report(report, dates, build, **params):
+    """
+    build() for a report and its normalized filters, cached.
+
+    `dates` is the report's DateRange and `params` any other filters. Ranges
+    that ended before now cannot gain new sales, so they are cached for a day
+    and only dropped when history changes; ranges reaching the present are
+    also dropped by every new sale or cash transaction.
+    """
+    closed = dates.end is not None and dates.end <= timezone.now()
+    if dates.start is None:
+        period = 'all'
+    else:
+        period = f'{dates.start.isoformat()}/{dates.end.isoformat()}'
+    filters = ','.join(f'{name}={params[name]}' for name in sorted(params))
+    version = generation(HISTORY_KEY)
+    if not closed:
+        version = f'{version}.{generation(GENERATION_KEY)}'
+    key = f'{CACHE_PREFIX}:{report}:{version}:{period}:{filters}'
+    kind = 'closed' if closed else 'open'
+
+    data = cache.get(key)
+    if data is not None:
+        count(f'{CACHE_PREFIX}:{kind}_hits')
+        return data
+    count(f'{CACHE_PREFIX}:{kind}_misses')
+    data = build()
+    cache.set(key, data, CLOSED_RANGE_TIMEOUT if closed else OPEN_RANGE_TIMEOUT)
+    return data
+
+
+def cache_stats():
+    """Hit and miss counters of the report cache, for open and closed ranges."""
+    stats = {'generation': generation(GENERATION_KEY), 'history': generation(HISTORY_KEY)}
+    hits = misses = 0
+    for kind in ('open', 'closed'):
+        kind_hits = cache.get(f'{CACHE_PREFIX}:{kind}_hits', 0)
+        kind_misses = cache.get(f'{CACHE_PREFIX}:{kind}_misses', 0)
+        lookups = kind_hits + kind_misses
+        stats[kind] = {
+            'hits': kind_hits,
+            'misses': kind_misses,
+            'hit_rate': round(kind_hits / lookups, 4) if lookups else None,
+        }
+        hits, misses = hits + kind_hits, misses + kind_misses
+    stats['hit_rate'] = round(hits / (hits + misses), 4) if hits + misses else None
+    return stats
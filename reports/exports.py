@@ -0,0 +1,117 @@
+import heapq
+import tempfile
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from sales.exporters import iter_csv
+
+EXPORT_FORMATS = ('csv', 'xlsx')
+EXPORT_CHUNK_SIZE = 2000
+
+SALE_HEADERS = ['Recibo #', 'Fecha', 'Vendedor', 'Monto (BOB)']
+FINANCIAL_HEADERS = ['Fecha', 'Tipo', 'Referencia', 'Usuario', 'Monto (BOB)']
+INVENTORY_HEADERS = ['Producto', 'Categoría', 'Código de Barras', 'Stock', 'Costo (BOB)', 'Precio (BOB)',
+                     'Valor al Costo (BOB)', 'Valor de Venta (BOB)', 'Margen Potencial (BOB)', 'Última Actualización']
+
+
+def _local(value):
+    # Spreadsheets have no time zones; export wall-clock time.
+    return timezone.localtime(value).replace(tzinfo=None)
+
+
+def sale_rows(sales):
+    """Export rows of a Sale queryset, newest first, read from a chunked cursor."""
+    rows = sales.order_by('-date_added', '-pk').values_list(
+        'receipt_number', 'date_added', 'salesperson__username', 'total_amount')
+    for receipt_number, date_added, username, total_amount in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield receipt_number, _local(date_added), username, total_amount
+
+
+def financial_rows(sales, transactions):
+    """Sales and cash movements merged into one ledger, newest first."""
+    sale_entries = (
+        (date_added, 'Venta', receipt_number, username, total_amount)
+        for receipt_number, date_added, username, total_amount in sales.order_by('-date_added', '-pk').values_list(
+            'receipt_number', 'date_added', 'salesperson__username', 'total_amount').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    labels = {'IN': 'Ingreso', 'OUT': 'Egreso'}
+    cash_entries = (
+        (date, labels.get(kind, kind), description, username, amount if kind == 'IN' else -amount)
+        for date, kind, description, username, amount in transactions.order_by('-date', '-pk').values_list(
+            'date', 'type', 'description', 'user__username', 'amount').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    for date, *rest in heapq.merge(sale_entries, cash_entries, key=lambda entry: entry[0], reverse=True):
+        yield (_local(date), *rest)
+
+
+def inventory_rows(products):
+    """Export rows of a queryset from reports.inventory.valued_products()."""
+    rows = products.values_list('name', 'category__name', 'barcode', 'stock', 'cost', 'price',
+                                'stock_value', 'retail_value', 'margin', 'last_updated')
+    for *values, last_updated in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        name, category, barcode, *rest = values
+        yield (name, category or '', barcode or '', *rest, _local(last_updated))
+
+
+def write_xlsx(headers, rows, output, title='Reporte'):
+    """
+    Write `rows` to `output` as an .xlsx file.
+
+    openpyxl's write-only mode streams each row to a temporary file as it is
+    appended, so memory stays flat whatever the number of rows.
+    """
+    import openpyxl
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(title=title)
+    ws.append(headers)
+    for row in rows:
+        ws.append(row)
+    wb.save(output)
+
+
+def export_response(export_format, filename, headers, rows, title='Reporte'):
+    if export_format == 'csv':
+        response = StreamingHttpResponse(iter_csv(headers, rows), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+        return response
+
+    # The zip container is only complete once every row is in, so the
+    # workbook is built in a temporary file and streamed from there.
+    output = tempfile.TemporaryFile()
+    write_xlsx(headers, rows, output, title)
+    output.seek(0)
+    return FileResponse(
+        output, as_attachment=True, filename=f'{filename}.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+
+
+class ReportExportMixin:
+    """
+    Adds ?export=csv and ?export=xlsx to a report view.
+
+    The view provides get_export_rows() returning (headers, rows) for the
+    same filters as the page; rows should be a generator over a chunked
+    cursor so the export never holds the whole result in memory.
+    """
+    export_name = 'reporte'
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get('export')
+        if export_format in EXPORT_FORMATS:
+            headers, rows = self.get_export_rows()
+            filename = f'{self.export_name}-{timezone.localdate():%Y%m%d}'
+            return export_response(export_format, filename, headers, rows, title=self.export_name.capitalize())
+        return super().get(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        filters = self.request.GET.copy()
+        for param in ('after', 'before', 'export'):
+            filters.pop(param, None)
+        for export_format in EXPORT_FORMATS:
+            query = filters.copy()
+            query['export'] = export_format
+            context[f'export_{export_format}_query'] = query.urlencode()
+        return context
@@ -0,0 +1,68 @@
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta
+
+from django.utils import timezone
+
+DATE_RANGES = ('today', 'week', 'month', 'year', 'custom')
+
+
+class DateRange(namedtuple('DateRange', ['start', 'end'])):
+    """
+    Half-open [start, end) range of aware datetimes; both None means no filter.
+
+    Filters compare the bare column against constants (`col >= start AND
+    col < end`), so a plain or composite index on the column can serve them,
+    unlike __date or __year lookups, which wrap the column in a function.
+    """
+
+    def filter(self, queryset, field):
+        """Rows of `queryset` whose datetime `field` falls in the range."""
+        if self.start is None:
+            return queryset
+        return queryset.filter(**{f'{field}__gte': self.start, f'{field}__lt': self.end})
+
+    def filter_days(self, queryset, field='day'):
+        """Rows of `queryset` whose local date `field` falls in the range."""
+        if self.start is None:
+            return queryset
+        start, end = timezone.localdate(self.start), timezone.localdate(self.end)
+        return queryset.filter(**{f'{field}__gte': start, f'{field}__lt': end})
+
+
+def _start_of(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def report_date_range(date_range, start_date_str=None, end_date_str=None, today=None):
+    """
+    The DateRange of a report filter, in the current time zone.
+
+    'today', 'week', 'month' and 'year' are the current calendar periods;
+    'custom' covers start_date through end_date inclusive. Anything else,
+    including a custom range with a missing or invalid date, is unfiltered.
+    """
+    today = today or timezone.localdate()
+    if date_range == 'today':
+        first, last = today, today
+    elif date_range == 'week':
+        first = today - timedelta(days=today.weekday())
+        last = first + timedelta(days=6)
+    elif date_range == 'month':
+        first = today.replace(day=1)
+        last = (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    elif date_range == 'year':
+        first, last = today.replace(month=1, day=1), today.replace(month=12, day=31)
+    elif date_range == 'custom':
+        first, last = _parse_date(start_date_str), _parse_date(end_date_str)
+        if first is None or last is None:
+            return DateRange(None, None)
+    else:
+        return DateRange(None, None)
+    return DateRange(_start_of(first), _start_of(last + timedelta(days=1)))
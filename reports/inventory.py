@@ -0,0 +1,85 @@
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from sales.models import LOW_STOCK_THRESHOLD, Product
+
+STOCK_LEVELS = ('all', 'low', 'out')
+# Sort keys accepted from the query string, prefixed with '-' for descending.
+SORT_FIELDS = {
+    'name': 'name',
+    'category': 'category__name',
+    'stock': 'stock',
+    'cost': 'cost',
+    'price': 'price',
+    'stock_value': 'stock_value',
+    'retail_value': 'retail_value',
+    'margin': 'margin',
+}
+DEFAULT_SORT = 'name'
+
+_money = DecimalField(max_digits=16, decimal_places=2)
+
+
+def _valuations():
+    return {
+        'stock_value': ExpressionWrapper(F('stock') * F('cost'), output_field=_money),
+        'retail_value': ExpressionWrapper(F('stock') * F('price'), output_field=_money),
+        'margin': ExpressionWrapper(F('stock') * (F('price') - F('cost')), output_field=_money),
+    }
+
+
+def valued_products():
+    """Products annotated with their stock valued at cost and at price, and the margin between."""
+    return Product.objects.annotate(**_valuations())
+
+
+def filter_stock_level(products, level):
+    """
+    'low' and 'out' select rows inside the partial product_low_stock_idx
+    (stock <= LOW_STOCK_THRESHOLD), so they are read from that index.
+    """
+    if level == 'low':
+        return products.filter(stock__gt=0, stock__lte=LOW_STOCK_THRESHOLD)
+    if level == 'out':
+        return products.filter(stock__lte=0)
+    return products
+
+
+def normalize_sort(sort):
+    """A valid sort key from the query string, or DEFAULT_SORT."""
+    return sort if sort and sort.lstrip('-') in SORT_FIELDS else DEFAULT_SORT
+
+
+def order_products(products, sort):
+    sort = normalize_sort(sort)
+    field = SORT_FIELDS[sort.lstrip('-')]
+    descending = sort.startswith('-')
+    # pk breaks ties so pages never repeat or skip rows.
+    return products.order_by(f'-{field}' if descending else field, '-pk' if descending else 'pk')
+
+
+def _valuation_aggregates():
+    # Sums of the expressions themselves: aggregates may not refer to
+    # annotations they share a name with.
+    zero = Value(0, output_field=_money)
+    totals = {name: Coalesce(Sum(expression), zero) for name, expression in _valuations().items()}
+    return {'units': Coalesce(Sum('stock'), 0), **totals}
+
+
+def valuation_totals(products):
+    """Product count, units and values of `products` (plain Product rows), in one aggregate query."""
+    return products.aggregate(
+        products=Count('pk'),
+        low_stock=Count('pk', filter=Q(stock__gt=0, stock__lte=LOW_STOCK_THRESHOLD)),
+        out_of_stock=Count('pk', filter=Q(stock__lte=0)),
+        **_valuation_aggregates(),
+    )
+
+
+def category_totals(products):
+    """The same totals grouped by category, largest stock value first."""
+    return list(
+        products.values('category__name')
+        .annotate(products=Count('pk'), **_valuation_aggregates())
+        .order_by('-stock_value')
+    )
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import time
+import tracemalloc
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reports.exports import SALE_HEADERS, sale_rows, write_xlsx
+from sales.exporters import iter_csv
+from sales.models import Sale
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the sales report export: rows/s and peak Python memory per format (changes are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Synthetic sales to export')
+        parser.add_argument('--formats', default='csv,xlsx', help='Comma-separated export formats')
+        parser.add_argument('--trace-memory', action='store_true',
+                            help='Report peak Python memory (tracemalloc slows the run down several times)')
+
+    def handle(self, *args, **options):
+        formats = [f.strip() for f in options['formats'].split(',') if f.strip()]
+
+        self.stdout.write(f"{'format':>7} {'rows':>9} {'seconds':>8} {'rows/s':>9} {'peak MB':>8} {'size MB':>8}")
+        try:
+            with transaction.atomic():
+                user = User.objects.create(username='__bench_export__')
+                Sale.objects.bulk_create(
+                    (Sale(salesperson=user, total_amount=Decimal('10.00'), receipt_number=f'BENCH-{i:09d}')
+                     for i in range(options['rows'])),
+                    batch_size=5000,
+                )
+                sales = Sale.objects.filter(salesperson=user)
+                for export_format in formats:
+                    self.bench_format(export_format, sales, options['trace_memory'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def bench_format(self, export_format, sales, trace_memory):
+        with tempfile.TemporaryFile() as output:
+            if trace_memory:
+                tracemalloc.start()
+            start = time.perf_counter()
+            rows = 0
+
+            def counted():
+                nonlocal rows
+                for row in sale_rows(sales):
+                    rows += 1
+                    yield row
+
+            if export_format == 'csv':
+                for line in iter_csv(SALE_HEADERS, counted()):
+                    output.write(line.encode())
+            else:
+                write_xlsx(SALE_HEADERS, counted(), output)
+            elapsed = time.perf_counter() - start
+            peak = None
+            if trace_memory:
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            size = output.seek(0, os.SEEK_END)
+
+        peak_mb = f'{peak / 2**20:.1f}' if peak is not None else '-'
+        self.stdout.write(
+            f'{export_format:>7} {rows:>9} {elapsed:>8.2f} {rows / elapsed:>9.0f} '
+            f'{peak_mb:>8} {size / 2**20:>8.1f}'
+        )
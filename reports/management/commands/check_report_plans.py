@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from reports.plans import PLAN_VENDORS, check_report_plans
+
+
+class Command(BaseCommand):
+    help = ('Checks that the report date-range queries are served by indexes, '
+            'by inspecting their query plans with sequential scans disabled')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan')
+
+    def handle(self, *args, **options):
+        failures = []
+        for label, plan, problem in check_report_plans():
+            if options['verbose_plans']:
+                self.stdout.write(f'{label}:\n{plan}\n')
+            if problem:
+                failures.append(f'{label}: {problem}\n{plan}')
+            else:
+                self.stdout.write(f'ok  {label}')
+
+        if connection.vendor not in PLAN_VENDORS:
+            self.stdout.write(self.style.WARNING(f'Plans are not checked on {connection.vendor}; use --verbose-plans'))
+        if failures:
+            raise CommandError('Report queries without a usable index:\n\n' + '\n\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('All report queries can use an index'))
@@ -0,0 +1,59 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import Q
+
+PAGE_SIZE = 50
+
+
+def encode_cursor(date_added, pk):
+    return f'{int(date_added.timestamp() * 1_000_000)}-{pk}'
+
+
+def decode_cursor(token):
+    """(date_added, pk) from a cursor token, or None if it is missing or invalid."""
+    try:
+        micros, pk = (int(part) for part in token.split('-'))
+    except (AttributeError, ValueError):
+        return None
+    return datetime.fromtimestamp(micros / 1_000_000, tz=dt_timezone.utc), pk
+
+
+def keyset_page(queryset, after=None, before=None, page_size=PAGE_SIZE):
+    """
+    One page of `queryset`, newest first, by keyset on (date_added, id).
+
+    `after` continues past the last row of the previous page and `before`
+    goes back from the first row of the next one. Each page is a range scan
+    from the cursor, so it costs the same however deep it is, unlike OFFSET.
+    The planner cannot turn the OR of the tie-break into an index bound, so
+    the redundant date_added bound next to it is what starts the scan at
+    the cursor.
+
+    Returns (rows, next_cursor, prev_cursor); cursors are None at the ends.
+    """
+    after, before = decode_cursor(after), decode_cursor(before)
+    if before:
+        date_added, pk = before
+        rows = list(
+            queryset.filter(date_added__gte=date_added)
+            .filter(Q(date_added__gt=date_added) | Q(date_added=date_added, pk__gt=pk))
+            .order_by('date_added', 'pk')[:page_size + 1]
+        )
+        has_more = len(rows) > page_size
+        rows = rows[:page_size][::-1]
+        has_next, has_prev = True, has_more
+    else:
+        if after:
+            date_added, pk = after
+            queryset = (
+                queryset.filter(date_added__lte=date_added)
+                .filter(Q(date_added__lt=date_added) | Q(date_added=date_added, pk__lt=pk))
+            )
+        rows = list(queryset.order_by('-date_added', '-pk')[:page_size + 1])
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        has_prev = after is not None
+
+    next_cursor = encode_cursor(rows[-1].date_added, rows[-1].pk) if rows and has_next else None
+    prev_cursor = encode_cursor(rows[0].date_added, rows[0].pk) if rows and has_prev else None
+    return rows, next_cursor, prev_cursor
@@ -0,0 +1,63 @@
+import re
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+
+from sales.models import CashTransaction, Sale
+
+from .filters import report_date_range
+
+PLAN_VENDORS = ('postgresql', 'sqlite')
+
+
+def report_queries():
+    """(label, table, date column, queryset) of each report date-range query."""
+    salesperson_id = User.objects.values_list('pk', flat=True).first() or 1
+    for date_range, start, end in [
+        ('today', None, None), ('week', None, None), ('month', None, None),
+        ('year', None, None), ('custom', '2025-01-01', '2025-03-31'),
+    ]:
+        dates = report_date_range(date_range, start, end)
+        sales = dates.filter(Sale.objects.all(), 'date_added')
+        transactions = dates.filter(CashTransaction.objects.all(), 'date')
+        yield (f'sales page ({date_range})', 'sales_sale', 'date_added',
+               sales.order_by('-date_added', '-pk')[:51])
+        yield (f'salesperson sales page ({date_range})', 'sales_sale', 'date_added',
+               sales.filter(salesperson_id=salesperson_id).order_by('-date_added', '-pk')[:51])
+        for kind in ('IN', 'OUT'):
+            yield (f'cash {kind} total ({date_range})', 'sales_cashtransaction', 'date',
+                   transactions.filter(type=kind).values_list('amount'))
+
+
+def plan_problem(plan, table, column):
+    """
+    Why `plan` does not serve the date range from an index, or None if it does.
+
+    On PostgreSQL the range must appear in an Index Cond: a plan that scans
+    an index only for its order and filters the dates row by row reads the
+    whole table just the same, without a Seq Scan to show for it.
+    """
+    if connection.vendor == 'postgresql':
+        if f'Seq Scan on {table}' in plan:
+            return f'full scan of {table}'
+        if not re.search(rf'Index Cond: .*\b{column}\b', plan):
+            return f'no index condition on {table}.{column}'
+    elif connection.vendor == 'sqlite':
+        if re.search(rf'\bSCAN {table}\b', plan):
+            return f'full scan of {table}'
+    return None
+
+
+def check_report_plans():
+    """(label, plan, problem) of every report query; problem is None when it passes."""
+    results = []
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            # With sequential scans priced out, the planner falls back to
+            # one only when no index can serve the query at all.
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        for label, table, column, queryset in report_queries():
+            plan = queryset.explain()
+            results.append((label, plan, plan_problem(plan, table, column)))
+    return results
@@ -0,0 +1,22 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from sales.models import CashTransaction, Sale
+from sales.rollups import rollups_rebuilt
+
+from .cache import invalidate_reports
+
+
+@receiver(post_save, sender=Sale)
+@receiver(post_save, sender=CashTransaction)
+def invalidate_report_cache(sender, created, **kwargs):
+    # New rows are dated now; edits may touch any past range.
+    transaction.on_commit(lambda: invalidate_reports(history=not created))
+
+
+@receiver(post_delete, sender=Sale)
+@receiver(post_delete, sender=CashTransaction)
+@receiver(rollups_rebuilt)
+def invalidate_report_history(sender, **kwargs):
+    transaction.on_commit(lambda: invalidate_reports(history=True))
@@ -1,3 +1,14 @@
+from unittest import skipUnless
+
+from django.db import connection
 from django.test import TestCase
 
-# Create your tests here.
+from .plans import check_report_plans
+
+
+@skipUnless(connection.vendor == 'postgresql', 'query plans are checked on PostgreSQL')
+class ReportPlanTests(TestCase):
+    def test_report_date_ranges_use_an_index_condition(self):
+        for label, plan, problem in check_report_plans():
+            with self.subTest(label):
+                self.assertIsNone(problem, plan)
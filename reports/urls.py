@@ -6,4 +6,5 @@ urlpatterns = [
     path('financial/', views.FinancialReportView.as_view(), name='financial_report'),
     path('sales/', views.SalesReportView.as_view(), name='sales_report'),
     path('inventory/', views.InventoryReportView.as_view(), name='inventory_report'),
+    path('cache/stats/', views.ReportCacheStatsView.as_view(), name='report_cache_stats'),
 ]
@@ -1,55 +1,63 @@
 from django.shortcuts import render
-from django.views.generic import TemplateView
-from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.views.generic import ListView, TemplateView, View
+from django.http import JsonResponse
+from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db.models import Sum
-from django.utils import timezone
 from django.contrib.auth.models import User
-from sales.models import Sale, CashTransaction, Product
-from datetime import timedelta
-
-class AdminRequiredMixin(UserPassesTestMixin):
-    def test_func(self):
-        return self.request.user.is_superuser or self.request.user.groups.filter(name='Admin').exists()
+from users.roles import AdminRequiredMixin
+from sales.models import LOW_STOCK_THRESHOLD, Product, Sale, CashTransaction, DailySalesSummary, DailyProductSales
+from .cache import cache_stats, cached_report
+from .filters import report_date_range
+from .inventory import (
+    SORT_FIELDS, STOCK_LEVELS, category_totals, filter_stock_level, normalize_sort,
+    order_products, valuation_totals, valued_products,
+)
+from .pagination import keyset_page
+from .exports import (
+    FINANCIAL_HEADERS, INVENTORY_HEADERS, SALE_HEADERS, ReportExportMixin,
+    financial_rows, inventory_rows, sale_rows,
+)
 
 class ReportsIndexView(LoginRequiredMixin, AdminRequiredMixin, TemplateView):
     template_name = 'reports/index.html'
 
-class FinancialReportView(LoginRequiredMixin, AdminRequiredMixin, TemplateView):
+class FinancialReportView(LoginRequiredMixin, AdminRequiredMixin, ReportExportMixin, TemplateView):
     template_name = 'reports/report.html'
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        # Filters
-        date_range = self.request.GET.get('date_range', 'today')
-        start_date_str = self.request.GET.get('start_date')
-        end_date_str = self.request.GET.get('end_date')
-
-        # Base QuerySets
-        sales = Sale.objects.all()
-        transactions = CashTransaction.objects.all()
-
-        # Date Filtering
-        today = timezone.now().date()
-        if date_range == 'today':
-            sales = sales.filter(date_added__date=today)
-            transactions = transactions.filter(date=today)
-        elif date_range == 'week':
-            start_week = today - timedelta(days=today.weekday())
-            sales = sales.filter(date_added__date__gte=start_week)
-            transactions = transactions.filter(date__gte=start_week)
-        elif date_range == 'month':
-            sales = sales.filter(date_added__year=today.year, date_added__month=today.month)
-            transactions = transactions.filter(date__year=today.year, date__month=today.month)
-        elif date_range == 'year':
-            sales = sales.filter(date_added__year=today.year)
-            transactions = transactions.filter(date__year=today.year)
-        elif date_range == 'custom' and start_date_str and end_date_str:
-            sales = sales.filter(date_added__date__range=[start_date_str, end_date_str])
-            transactions = transactions.filter(date__range=[start_date_str, end_date_str])
-        
-        # 1. Total Sales
-        total_sales = sales.aggregate(total=Sum('total_amount'))['total'] or 0
+    export_name = 'reporte-financiero'
+
+    def filter_dates(self):
+        return report_date_range(
+            self.request.GET.get('date_range', 'today'),
+            self.request.GET.get('start_date'),
+            self.request.GET.get('end_date'),
+        )
+
+    def filtered_querysets(self, dates):
+        """Sales and cash transactions in the report's date range."""
+        sales = dates.filter(Sale.objects.all(), 'date_added')
+        transactions = dates.filter(CashTransaction.objects.all(), 'date')
+        return sales, transactions
+
+    def get_export_rows(self):
+        return FINANCIAL_HEADERS, financial_rows(*self.filtered_querysets(self.filter_dates()))
+
+    def report_data(self, dates):
+        sales, transactions = self.filtered_querysets(dates)
+
+        # 1. Total Sales, from the daily rollups rather than every sale row
+        daily_sales = dates.filter_days(DailySalesSummary.objects.all())
+        total_sales = daily_sales.aggregate(total=Sum('total_amount'))['total'] or 0
+        sales_by_salesperson = (
+            daily_sales.values('salesperson__username')
+            .annotate(sale_count=Sum('sale_count'), total=Sum('total_amount'))
+            .order_by('-total')
+        )
+        sales_by_category = (
+            dates.filter_days(DailyProductSales.objects.all())
+            .values('product__category__name')
+            .annotate(quantity=Sum('quantity'), total=Sum('total'))
+            .order_by('-total')
+        )
         
         # 2. Cash Transactions
         cash_in = transactions.filter(type='IN').aggregate(total=Sum('amount'))['total'] or 0
@@ -62,13 +70,29 @@ class FinancialReportView(LoginRequiredMixin, AdminRequiredMixin, TemplateView):
         recent_sales = sales.order_by('-date_added')[:10]
         recent_cash_movements = transactions.order_by('-date')[:10]
 
-        context.update({
+        # Evaluated here so the cache stores rows, not querysets.
+        return {
             'total_sales': total_sales,
             'cash_in': cash_in,
             'cash_out': cash_out,
             'net_balance': net_balance,
-            'recent_sales': recent_sales,
-            'recent_cash_movements': recent_cash_movements,
+            'sales_by_salesperson': list(sales_by_salesperson),
+            'sales_by_category': list(sales_by_category),
+            'recent_sales': list(recent_sales),
+            'recent_cash_movements': list(recent_cash_movements),
+        }
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        
+        # Filters
+        date_range = self.request.GET.get('date_range', 'today')
+        start_date_str = self.request.GET.get('start_date')
+        end_date_str = self.request.GET.get('end_date')
+        dates = self.filter_dates()
+
+        context.update(cached_report('financial', dates, lambda: self.report_data(dates)))
+        context.update({
             'current_filters': {
                 'date_range': date_range,
                 'is_today': date_range == 'today',
@@ -82,38 +106,64 @@ class FinancialReportView(LoginRequiredMixin, AdminRequiredMixin, TemplateView):
         })
         return context
 
-class SalesReportView(LoginRequiredMixin, AdminRequiredMixin, TemplateView):
+class SalesReportView(LoginRequiredMixin, AdminRequiredMixin, ReportExportMixin, TemplateView):
     template_name = 'reports/sales_report_fixed.html'
+    export_name = 'reporte-ventas'
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        
-        # Filters
+    def filtered_sales(self):
+        """Sales matching the report filters."""
         date_range = self.request.GET.get('date_range', 'today')
         start_date_str = self.request.GET.get('start_date')
         end_date_str = self.request.GET.get('end_date')
         salesperson_id = self.request.GET.get('salesperson')
 
-        sales = Sale.objects.all().order_by('-date_added')
-        
-        # Date Filtering
-        today = timezone.now().date()
-        if date_range == 'today':
-            sales = sales.filter(date_added__date=today)
-        elif date_range == 'week':
-            start_week = today - timedelta(days=today.weekday())
-            sales = sales.filter(date_added__date__gte=start_week)
-        elif date_range == 'month':
-            sales = sales.filter(date_added__year=today.year, date_added__month=today.month)
-        elif date_range == 'custom' and start_date_str and end_date_str:
-            sales = sales.filter(date_added__date__range=[start_date_str, end_date_str])
+        # The template shows each sale's salesperson; load it in the same query.
+        dates = report_date_range(date_range, start_date_str, end_date_str)
+        sales = dates.filter(Sale.objects.select_related('salesperson'), 'date_added')
 
         # Salesperson Filtering
         if salesperson_id and salesperson_id != 'all':
             sales = sales.filter(salesperson_id=salesperson_id)
+        return sales
+
+    def get_export_rows(self):
+        return SALE_HEADERS, sale_rows(self.filtered_sales())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        
+        # Filters
+        date_range = self.request.GET.get('date_range', 'today')
+        start_date_str = self.request.GET.get('start_date')
+        end_date_str = self.request.GET.get('end_date')
+        salesperson_id = self.request.GET.get('salesperson')
 
-        # Calculate Total for filtered sales
-        total_sales = sales.aggregate(total=Sum('total_amount'))['total'] or 0
+        sales = self.filtered_sales()
+        dates = report_date_range(date_range, start_date_str, end_date_str)
+        daily_sales = dates.filter_days(DailySalesSummary.objects.all())
+        if salesperson_id and salesperson_id != 'all':
+            daily_sales = daily_sales.filter(salesperson_id=salesperson_id)
+
+        # Totals cover every filtered sale, not just this page; they come from
+        # the daily rollups.
+        totals = cached_report(
+            'sales_totals', dates,
+            lambda: daily_sales.aggregate(total=Sum('total_amount'), count=Sum('sale_count')),
+            salesperson=salesperson_id if salesperson_id and salesperson_id != 'all' else 'all',
+        )
+        total_sales = totals['total'] or 0
+
+        page, next_cursor, prev_cursor = keyset_page(
+            sales, after=self.request.GET.get('after'), before=self.request.GET.get('before'),
+        )
+        filters = self.request.GET.copy()
+        filters.pop('after', None)
+        filters.pop('before', None)
+
+        def page_query(**cursor):
+            query = filters.copy()
+            query.update(cursor)
+            return query.urlencode()
 
         # Prepare salespeople with selection state
         salespeople = []
@@ -122,8 +172,11 @@ class SalesReportView(LoginRequiredMixin, AdminRequiredMixin, TemplateView):
             salespeople.append(user)
 
         context.update({
-            'sales': sales,
+            'sales': page,
             'total_sales': total_sales,
+            'sale_count': totals['count'] or 0,
+            'next_page_query': page_query(after=next_cursor) if next_cursor else None,
+            'prev_page_query': page_query(before=prev_cursor) if prev_cursor else None,
             'salespeople': salespeople,
             'current_filters': {
                 'date_range': date_range,
@@ -138,10 +191,51 @@ class SalesReportView(LoginRequiredMixin, AdminRequiredMixin, TemplateView):
         })
         return context
 
-class InventoryReportView(LoginRequiredMixin, AdminRequiredMixin, TemplateView):
+class InventoryReportView(LoginRequiredMixin, AdminRequiredMixin, ReportExportMixin, ListView):
     template_name = 'reports/inventory_report.html'
+    export_name = 'reporte-inventario'
+    context_object_name = 'products'
+    paginate_by = 50
+
+    def get_queryset(self):
+        products = valued_products().select_related('category')
+        products = filter_stock_level(products, self.request.GET.get('stock', 'all'))
+        return order_products(products, self.request.GET.get('sort'))
+
+    def get_export_rows(self):
+        return INVENTORY_HEADERS, inventory_rows(self.get_queryset())
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['products'] = Product.objects.all().order_by('name')
+        stock_level = self.request.GET.get('stock', 'all')
+        sort = normalize_sort(self.request.GET.get('sort'))
+
+        # Valuation is aggregated in the database over the whole filtered set.
+        filtered = filter_stock_level(Product.objects.all(), stock_level)
+        context['totals'] = valuation_totals(filtered)
+        context['category_totals'] = category_totals(filtered)
+
+        filters = self.request.GET.copy()
+        filters.pop('page', None)
+        filters.pop('export', None)
+
+        def query(**params):
+            q = filters.copy()
+            for name, value in params.items():
+                q[name] = value
+            return q.urlencode()
+
+        # Clicking the current sort column flips its direction.
+        context['sort_queries'] = {
+            key: query(sort=f'-{key}' if sort == key else key) for key in SORT_FIELDS
+        }
+        context['current_sort'] = sort
+        context['stock_level'] = stock_level
+        context['stock_level_queries'] = {level: query(stock=level) for level in STOCK_LEVELS}
+        context['page_query'] = query()
+        context['low_stock_threshold'] = LOW_STOCK_THRESHOLD
         return context
+
+class ReportCacheStatsView(LoginRequiredMixin, AdminRequiredMixin, View):
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(cache_stats())
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Product, Sale, SaleItem, ExchangeRate
+from .models import Category, Product, Sale, SaleItem, ExchangeRate, ReceiptSequence, ImportJob, RejectedSale
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -17,13 +17,46 @@ class ProductAdmin(admin.ModelAdmin):
     search_fields = ('name', 'barcode')
     readonly_fields = ('price_usd', 'last_updated')
 
+@admin.register(ReceiptSequence)
+class ReceiptSequenceAdmin(admin.ModelAdmin):
+    list_display = ('prefix', 'next_value')
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'status', 'user', 'rows_processed', 'total_rows', 'error_count', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    readonly_fields = ('started_at', 'finished_at', 'created_at')
+
+@admin.register(RejectedSale)
+class RejectedSaleAdmin(admin.ModelAdmin):
+    list_display = ('idempotency_key', 'salesperson', 'register', 'error', 'queued_at', 'created_at', 'resolved')
+    list_filter = ('resolved', 'register')
+    list_editable = ('resolved',)
+    readonly_fields = ('salesperson', 'idempotency_key', 'register', 'items', 'error', 'queued_at', 'created_at')
+
+# Sales are only created by checkout, which also deducts stock and updates
+# the daily rollups behind the reports; the admin can view and delete them
+# (deletion reverses the rollups through a signal) but not add or edit them.
 class SaleItemInline(admin.TabularInline):
     model = SaleItem
     extra = 0
-    readonly_fields = ('total',)
+    readonly_fields = ('product', 'quantity', 'price', 'total')
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 @admin.register(Sale)
 class SaleAdmin(admin.ModelAdmin):
     list_display = ('receipt_number', 'salesperson', 'date_added', 'total_amount')
     inlines = [SaleItemInline]
-    readonly_fields = ('receipt_number', 'date_added', 'total_amount')
+    readonly_fields = ('receipt_number', 'salesperson', 'date_added', 'total_amount')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,166 @@
+import threading
+import time
+from collections import deque
+
+from django.utils import timezone
+
+from .models import Product
+from .pos_catalog import FEED_LOOKBACK, POS_PRODUCT_FIELDS, catalog_generation, pos_product_dict
+
+# How often a worker asks the cache whether the catalog changed.
+STALE_CHECK_INTERVAL = 1.0
+# The generation lives in the per-process cache, so changes committed by
+# other workers do not move it here. The index therefore also re-reads
+# recently changed products at least this often, and is rebuilt from
+# scratch (dropping products deleted elsewhere) every REBUILD_INTERVAL.
+REFRESH_MAX_AGE = 30.0
+REBUILD_INTERVAL = 10 * 60.0
+LATENCY_SAMPLES = 10000
+
+
+class BarcodeIndex:
+    """
+    In-process barcode -> POS product dict map.
+
+    Built once per worker, then kept fresh by re-reading only the products
+    changed since the last refresh whenever the catalog generation moves or
+    REFRESH_MAX_AGE has passed, and rebuilt every REBUILD_INTERVAL. Misses
+    fall back to the unique index on Product.barcode.
+    """
+
+    def __init__(self):
+        self._by_barcode = {}
+        self._barcode_by_id = {}
+        self._lock = threading.Lock()
+        self._generation = None
+        self._refreshed_at = None
+        self._next_check = 0.0
+        self._refresh_due = 0.0
+        self._rebuild_due = 0.0
+        # Set while one thread reads products for a refresh; ids removed
+        # meanwhile are dropped again once the refresh is applied.
+        self._refreshing = False
+        self._removed_while_refreshing = set()
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.hits = 0
+        self.misses = 0
+
+    def _put(self, product):
+        old_barcode = self._barcode_by_id.get(product['id'])
+        if old_barcode and old_barcode != product['barcode']:
+            self._by_barcode.pop(old_barcode, None)
+        if product['barcode']:
+            self._by_barcode[product['barcode']] = product
+            self._barcode_by_id[product['id']] = product['barcode']
+        else:
+            self._barcode_by_id.pop(product['id'], None)
+
+    def remove(self, product_id):
+        with self._lock:
+            if self._refreshing:
+                self._removed_while_refreshing.add(product_id)
+            self._drop(product_id)
+
+    def _drop(self, product_id):
+        barcode = self._barcode_by_id.pop(product_id, None)
+        if barcode:
+            self._by_barcode.pop(barcode, None)
+
+    def mark_stale(self):
+        self._next_check = 0.0
+
+    def _claim_refresh(self):
+        """
+        Called under the lock. Returns (now, generation, rebuild) and marks
+        the refresh as taken when this thread should run one, else None.
+        """
+        now = time.monotonic()
+        if self._refreshing or now < self._next_check:
+            return None
+        self._next_check = now + STALE_CHECK_INTERVAL
+
+        generation = catalog_generation()
+        if generation == self._generation and now < self._refresh_due:
+            return None
+        self._refreshing = True
+        self._removed_while_refreshing = set()
+        return now, generation, self._refreshed_at is None or now >= self._rebuild_due
+
+    def _refresh(self, now, generation, rebuild):
+        """
+        Read the changed products, or all of them on a rebuild, without
+        holding the lock, so scans keep being answered from the current
+        maps meanwhile; only applying the result takes the lock.
+        """
+        try:
+            started_at = timezone.now()
+            if rebuild:
+                rows = Product.objects.exclude(barcode__isnull=True).exclude(barcode='')
+            else:
+                # Includes products whose barcode was cleared, so _put() drops them.
+                rows = Product.objects.filter(last_updated__gte=self._refreshed_at - FEED_LOOKBACK)
+            products = [pos_product_dict(row) for row in rows.values(*POS_PRODUCT_FIELDS).iterator(chunk_size=2000)]
+            if rebuild:
+                by_barcode = {product['barcode']: product for product in products}
+                barcode_by_id = {product['id']: product['barcode'] for product in products}
+
+            with self._lock:
+                if rebuild:
+                    self._by_barcode, self._barcode_by_id = by_barcode, barcode_by_id
+                else:
+                    for product in products:
+                        self._put(product)
+                for product_id in self._removed_while_refreshing:
+                    self._drop(product_id)
+                self._generation = generation
+                self._refreshed_at = started_at
+                self._refresh_due = now + REFRESH_MAX_AGE
+                if rebuild:
+                    self._rebuild_due = now + REBUILD_INTERVAL
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def lookup(self, barcode):
+        """POS product dict for `barcode`, or None."""
+        start = time.perf_counter()
+        with self._lock:
+            refresh = self._claim_refresh()
+        if refresh:
+            self._refresh(*refresh)
+        with self._lock:
+            product = self._by_barcode.get(barcode)
+            if product is not None:
+                self.hits += 1
+
+        if product is None:
+            row = Product.objects.filter(barcode=barcode).values(*POS_PRODUCT_FIELDS).first()
+            with self._lock:
+                self.misses += 1
+                if row:
+                    product = pos_product_dict(row)
+                    self._put(product)
+
+        self._latencies.append(time.perf_counter() - start)
+        return product
+
+    def stats(self):
+        latencies = sorted(self._latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 3)
+
+        return {
+            'barcodes': len(self._by_barcode),
+            'hits': self.hits,
+            'misses': self.misses,
+            'samples': len(latencies),
+            'p50_ms': percentile(0.50),
+            'p95_ms': percentile(0.95),
+            'p99_ms': percentile(0.99),
+        }
+
+
+barcode_index = BarcodeIndex()
@@ -0,0 +1,34 @@
+import time
+
+from django.core.cache import cache
+
+
+def generation(key):
+    """
+    Current value of the generation counter at `key`.
+
+    Cached entries keyed by a generation are invalidated by bump(), so
+    invalidating never has to find and delete old entries.
+    """
+    value = cache.get(key)
+    if value is None:
+        # Seed from the clock so a restarted cache never reuses old keys.
+        cache.add(key, time.time_ns(), None)
+        value = cache.get(key)
+    return value
+
+
+def bump(key):
+    """Advance the generation counter at `key`."""
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def count(key):
+    """Add one to the statistics counter at `key`."""
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
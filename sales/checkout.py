@@ -0,0 +1,271 @@
+import logging
+import random
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, IntegerField, When
+from django.utils import timezone
+
+from .models import Product, ReceiptSequence, RejectedSale, Sale, SaleIdempotencyKey, SaleItem
+from .pos_catalog import invalidate_catalog_cache
+from .receipts import DEFAULT_PREFIX, allocate_receipt_number
+from .rollups import record_sale
+
+logger = logging.getLogger(__name__)
+
+CENTS = Decimal('0.01')
+IDEMPOTENCY_KEY_TTL = timedelta(hours=getattr(settings, 'SALE_IDEMPOTENCY_TTL_HOURS', 24))
+# Fraction of checkouts that also purge expired idempotency keys.
+IDEMPOTENCY_PURGE_RATE = 0.01
+
+
+class CheckoutError(ValueError):
+    """Raised when a cart cannot be turned into a sale (bad input or stock)."""
+
+
+class StockConflictError(CheckoutError):
+    """Raised when a product no longer has enough stock for the cart."""
+
+
+def parse_cart(items):
+    """
+    Normalize the POS cart payload into (product_id, quantity, price) lines.
+
+    Lines with a non-positive quantity are skipped, as the register has
+    always done.
+    """
+    lines = []
+    for item in items:
+        try:
+            product_id = int(item.get('id'))
+            quantity = int(item.get('quantity', 0))
+            price = Decimal(str(item.get('price', 0))).quantize(CENTS)  # Editable price
+        except (TypeError, ValueError, InvalidOperation):
+            raise CheckoutError('Datos de producto inválidos en el carrito.')
+
+        if quantity <= 0:
+            continue
+        lines.append((product_id, quantity, price))
+
+    if not lines:
+        raise CheckoutError('El carrito está vacío.')
+    return lines
+
+
+def lock_and_deduct_stock(lines):
+    """
+    Lock every product in the cart with one ordered SELECT ... FOR UPDATE and
+    decrement stock with a single UPDATE. Must run inside a transaction.
+
+    Locking in primary key order keeps concurrent registers from deadlocking
+    on overlapping carts. Returns the locked products keyed by id.
+    """
+    requested = {}
+    for product_id, quantity, _ in lines:
+        requested[product_id] = requested.get(product_id, 0) + quantity
+
+    products = {
+        p.pk: p for p in Product.objects.select_for_update()
+        .filter(pk__in=requested)
+        .order_by('pk')
+        .only('id', 'name', 'stock')
+    }
+
+    for product_id, quantity in requested.items():
+        product = products.get(product_id)
+        if product is None:
+            raise CheckoutError(f"El producto {product_id} no existe.")
+        if product.stock < quantity:
+            raise StockConflictError(f"Stock insuficiente para {product.name}. Disponible: {product.stock}")
+
+    # QuerySet.update() skips auto_now, so stamp last_updated explicitly.
+    Product.objects.filter(pk__in=requested).update(
+        stock=Case(
+            *[When(pk=pk, then=F('stock') - qty) for pk, qty in requested.items()],
+            output_field=IntegerField(),
+        ),
+        last_updated=timezone.now(),
+    )
+    for product_id, quantity in requested.items():
+        products[product_id].stock -= quantity
+
+    # update() sends no post_save, so invalidate the POS catalog here.
+    transaction.on_commit(invalidate_catalog_cache)
+    return products
+
+
+def find_replayed_sale(salesperson, idempotency_key):
+    """Return the sale already committed under this key, if it has not expired."""
+    record = (
+        SaleIdempotencyKey.objects
+        .filter(salesperson=salesperson, key=idempotency_key,
+                created_at__gte=timezone.now() - IDEMPOTENCY_KEY_TTL)
+        .select_related('sale')
+        .first()
+    )
+    return record.sale if record else None
+
+
+def purge_expired_idempotency_keys():
+    """Delete idempotency keys older than the TTL. Returns how many were removed."""
+    cutoff = timezone.now() - IDEMPOTENCY_KEY_TTL
+    deleted, _ = SaleIdempotencyKey.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+def submit_sale(salesperson, items, register=DEFAULT_PREFIX, idempotency_key=None):
+    """
+    Idempotent wrapper around checkout() for the POS API.
+
+    Returns (sale, replayed). A key that was already used by this
+    salesperson returns the original sale without touching stock again,
+    including when two retries of the same request race each other.
+    """
+    if not idempotency_key:
+        return checkout(salesperson, items, register), False
+    _validate_idempotency_key(idempotency_key)
+
+    sale = find_replayed_sale(salesperson, idempotency_key)
+    if sale:
+        return sale, True
+
+    result = _checkout_with_key(salesperson, items, register, idempotency_key)
+    if random.random() < IDEMPOTENCY_PURGE_RATE:
+        purge_expired_idempotency_keys()
+    return result
+
+
+def submit_sale_batch(salesperson, queued_sales):
+    """
+    Commit a batch of sales queued by an offline register.
+
+    Keys already committed are resolved with a single lookup; the remaining
+    sales are checked out one by one, each in its own transaction, so a
+    stock conflict only rejects the sale that caused it. Returns one result
+    dict per queued sale, in order.
+
+    A sale the server refuses (CheckoutError) gets `rejected: True` and is
+    recorded as a RejectedSale for an admin to resolve, since the customer
+    has already paid. Any other failure, such as a deadlock or a lost
+    database connection, gets `retry: True`; the register keeps the sale
+    queued and sends it again.
+    """
+    keys = [queued.get('idempotency_key') for queued in queued_sales if queued.get('idempotency_key')]
+    committed = {
+        record.key: record.sale
+        for record in SaleIdempotencyKey.objects
+        .filter(salesperson=salesperson, key__in=keys,
+                created_at__gte=timezone.now() - IDEMPOTENCY_KEY_TTL)
+        .select_related('sale')
+    }
+
+    results = []
+    for queued in queued_sales:
+        key = queued.get('idempotency_key')
+        result = {'idempotency_key': key, 'success': False}
+        try:
+            if not key:
+                raise CheckoutError('Falta la clave de idempotencia.')
+            _validate_idempotency_key(key)
+            if key in committed:
+                sale, replayed = committed[key], True
+            else:
+                sale, replayed = _checkout_with_key(
+                    salesperson, queued.get('items') or [],
+                    queued.get('register') or DEFAULT_PREFIX, key,
+                )
+                committed[key] = sale
+            result.update(success=True, sale_id=sale.receipt_number, replayed=replayed)
+        except CheckoutError as e:
+            result.update(error=str(e), rejected=True, conflict=isinstance(e, StockConflictError))
+            if key and len(key) <= SaleIdempotencyKey._meta.get_field('key').max_length:
+                _record_rejected_sale(salesperson, queued, str(e))
+        except Exception:
+            logger.exception('Queued sale %s could not be committed; the register will retry it.', key)
+            result.update(error='Error temporal del servidor; la venta se reintentará.', retry=True)
+        results.append(result)
+    return results
+
+
+def _record_rejected_sale(salesperson, queued, error):
+    RejectedSale.objects.update_or_create(
+        salesperson=salesperson,
+        idempotency_key=queued['idempotency_key'],
+        defaults={
+            'register': str(queued.get('register') or DEFAULT_PREFIX)[:20],
+            'items': queued.get('items') or [],
+            'error': error,
+            'queued_at': str(queued.get('queued_at') or '')[:40],
+        },
+    )
+
+
+def _validate_idempotency_key(idempotency_key):
+    if len(idempotency_key) > SaleIdempotencyKey._meta.get_field('key').max_length:
+        raise CheckoutError('Clave de idempotencia inválida.')
+
+
+def _checkout_with_key(salesperson, items, register, idempotency_key):
+    try:
+        return checkout(salesperson, items, register, idempotency_key), False
+    except IntegrityError:
+        # A concurrent retry committed first; our transaction rolled back.
+        sale = find_replayed_sale(salesperson, idempotency_key)
+        if sale is None:
+            raise
+        return sale, True
+
+
+def checkout(salesperson, items, register=DEFAULT_PREFIX, idempotency_key=None):
+    """
+    Turn a POS cart into a Sale with a constant number of queries, whatever
+    the cart size: one locking read, one stock update, one header insert,
+    one bulk insert of the sale lines and four to update the daily rollups.
+
+    `register` is the receipt prefix of the till making the sale. When an
+    `idempotency_key` is given it is recorded in the same transaction.
+    """
+    lines = parse_cart(items)
+    total_amount = sum((quantity * price for _, quantity, price in lines), Decimal('0'))
+
+    # Allocated before the checkout transaction so the receipt counter is
+    # never locked while stock rows are.
+    try:
+        receipt_number = allocate_receipt_number(register)
+    except ReceiptSequence.DoesNotExist:
+        raise CheckoutError(f"Caja no registrada: {register}")
+
+    with transaction.atomic():
+        products = lock_and_deduct_stock(lines)
+
+        sale = Sale.objects.create(
+            salesperson=salesperson,
+            total_amount=total_amount,
+            receipt_number=receipt_number,
+        )
+
+        # bulk_create bypasses SaleItem.save(), so compute the line total here.
+        SaleItem.objects.bulk_create([
+            SaleItem(
+                sale=sale,
+                product=products[product_id],
+                quantity=quantity,
+                price=price,
+                total=quantity * price,
+            )
+            for product_id, quantity, price in lines
+        ])
+        record_sale(sale, [(product_id, quantity, quantity * price) for product_id, quantity, price in lines])
+
+        if idempotency_key:
+            # An expired key that has not been purged yet would still trip the
+            # unique constraint; it no longer guards anything, so drop it.
+            SaleIdempotencyKey.objects.filter(
+                salesperson=salesperson, key=idempotency_key,
+                created_at__lt=timezone.now() - IDEMPOTENCY_KEY_TTL,
+            ).delete()
+            SaleIdempotencyKey.objects.create(key=idempotency_key, salesperson=salesperson, sale=sale)
+
+    return sale
@@ -0,0 +1,97 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .importers import ROW_READERS, ProductImporter, ProductImportError, file_format
+from .models import ImportJob
+
+IMPORT_WORKERS = getattr(settings, 'PRODUCT_IMPORT_WORKERS', 2)
+# Jobs run in the process that accepted the upload; one that has not
+# reported progress for this long died with its worker.
+ORPHANED_AFTER = timedelta(minutes=getattr(settings, 'PRODUCT_IMPORT_ORPHANED_MINUTES', 10))
+
+_executor = ThreadPoolExecutor(max_workers=IMPORT_WORKERS, thread_name_prefix='product-import')
+
+
+def enqueue_import(job):
+    """Run the job in a background thread once the request that created it commits."""
+    transaction.on_commit(lambda: _executor.submit(run_import_job, job.pk))
+
+
+def fail_orphaned_jobs(jobs=None):
+    """
+    Mark pending or running jobs that stopped reporting progress as failed,
+    so their pages stop polling. Returns how many were marked.
+    """
+    jobs = ImportJob.objects.all() if jobs is None else jobs
+    cutoff = timezone.now() - ORPHANED_AFTER
+    return jobs.filter(
+        Q(status='PENDING', created_at__lt=cutoff)
+        | Q(status='RUNNING', heartbeat_at__lt=cutoff)
+        | Q(status='RUNNING', heartbeat_at__isnull=True, started_at__lt=cutoff)
+    ).update(
+        status='FAILED',
+        finished_at=timezone.now(),
+        message='La importación se interrumpió (el servidor se reinició). Vuelva a subir el archivo.',
+    )
+
+
+class _JobAbandoned(Exception):
+    """The job stopped being RUNNING while it ran, e.g. fail_orphaned_jobs() marked it."""
+
+
+def _running(job_id):
+    # Every write after the claim is guarded on RUNNING, so a job that was
+    # already reported as failed is never brought back to life.
+    return ImportJob.objects.filter(pk=job_id, status='RUNNING')
+
+
+def _publish_progress(job_id, importer):
+    if not _running(job_id).update(
+        heartbeat_at=timezone.now(),
+        rows_processed=importer.rows,
+        created=importer.created,
+        updated=importer.updated,
+        error_count=importer.error_count,
+        errors=importer.errors,
+    ):
+        raise _JobAbandoned
+
+
+def run_import_job(job_id):
+    """Import the job's file, recording progress on the job row as chunks commit."""
+    close_old_connections()
+    try:
+        # Claim the job; one failed meanwhile (say, after waiting in the
+        # queue behind long imports) has already been reported to the admin.
+        now = timezone.now()
+        if not ImportJob.objects.filter(pk=job_id, status='PENDING').update(
+                status='RUNNING', started_at=now, heartbeat_at=now):
+            return
+        job = ImportJob.objects.get(pk=job_id)
+        try:
+            iter_rows, count_rows = ROW_READERS[file_format(job.file.name)]
+            with job.file.open('rb') as f:
+                if not _running(job_id).update(total_rows=count_rows(f), heartbeat_at=timezone.now()):
+                    return
+            with job.file.open('rb') as f:
+                importer = ProductImporter(progress=lambda imp: _publish_progress(job_id, imp))
+                importer.run(iter_rows(f))
+        except _JobAbandoned:
+            return
+        except Exception as e:
+            message = str(e) if isinstance(e, ProductImportError) else f'Error al procesar el archivo: {e}'
+            _running(job_id).update(status='FAILED', message=message, finished_at=timezone.now())
+            return
+
+        _running(job_id).update(
+            status='DONE',
+            finished_at=timezone.now(),
+            message=f'Importación completada: {importer.created} creados, {importer.updated} actualizados ({importer.rows_per_second:.0f} filas/s).',
+        )
+    finally:
+        connection.close()
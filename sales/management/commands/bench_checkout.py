@@ -0,0 +1,64 @@
+import statistics
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from sales.checkout import checkout
+from sales.models import Product
+from sales.receipts import reserve_receipt_numbers
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the checkout path: queries and latency per cart size (changes are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1,5,10,20,40,80', help='Comma-separated cart sizes')
+        parser.add_argument('--iterations', type=int, default=50, help='Checkouts per cart size')
+
+    def handle(self, *args, **options):
+        sizes = [int(s) for s in options['sizes'].split(',') if s.strip()]
+        iterations = options['iterations']
+
+        # Inside the rollback transaction every allocation would reserve
+        # its own number from the counter row; production sales are numbered
+        # from the process's cached block, so fill it up front instead.
+        reserve_receipt_numbers(len(sizes) * iterations)
+
+        self.stdout.write(f"{'cart':>6} {'queries':>8} {'p50 ms':>9} {'p99 ms':>9}")
+        try:
+            with transaction.atomic():
+                user = User.objects.create(username='__bench_checkout__')
+                for size in sizes:
+                    self.bench_size(user, size, iterations)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def bench_size(self, user, size, iterations):
+        products = Product.objects.bulk_create([
+            Product(name=f'Bench {size}-{i}', price=Decimal('10.00'), cost=Decimal('5.00'), stock=iterations * 10)
+            for i in range(size)
+        ])
+        cart = [{'id': p.pk, 'quantity': 2, 'price': '10.00'} for p in products]
+
+        timings = []
+        queries = 0
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                checkout(user, cart)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries = len(ctx.captured_queries)
+
+        timings.sort()
+        p50 = statistics.median(timings)
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        self.stdout.write(f'{size:>6} {queries:>8} {p50:>9.2f} {p99:>9.2f}')
@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import F
+
+from sales.models import Product
+from sales.thumbnails import THUMBNAIL_WORKERS, generate_thumbnails
+
+
+def _generate(product_id):
+    try:
+        return generate_thumbnails(product_id)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Generates WebP thumbnails for product images that do not have them yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate thumbnails that already exist')
+        parser.add_argument('--workers', type=int, default=THUMBNAIL_WORKERS)
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(image='').exclude(image__isnull=True)
+        if not options['force']:
+            products = products.exclude(thumbnails_source=F('image'))
+        product_ids = list(products.values_list('pk', flat=True))
+        self.stdout.write(f'Generating thumbnails for {len(product_ids)} products')
+
+        done = failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = {executor.submit(_generate, pk): pk for pk in product_ids}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    done += 1
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f'Product {futures[future]}: {e}')
+        self.stdout.write(self.style.SUCCESS(f'Generated thumbnails for {done} products, {failed} failed'))
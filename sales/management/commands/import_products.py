@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sales.importers import ROW_READERS, ProductImporter, ProductImportError, file_format
+
+
+class Command(BaseCommand):
+    help = 'Imports products from an Excel (.xlsx) or CSV (.csv) file, printing progress as chunks commit'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to the .xlsx or .csv file')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if file_format(path) is None:
+            raise CommandError('The file must be .xlsx or .csv')
+        iter_rows, count_rows = ROW_READERS[file_format(path)]
+        try:
+            with open(path, 'rb') as f:
+                total = count_rows(f)
+        except OSError as e:
+            raise CommandError(str(e))
+
+        def progress(importer):
+            done = f'{importer.rows}/{total}' if total else str(importer.rows)
+            self.stdout.write(f'  {done} rows ({importer.rows_per_second:.0f} rows/s, {importer.error_count} errors)')
+
+        try:
+            with open(path, 'rb') as f:
+                result = ProductImporter(chunk_size=options['chunk_size'], progress=progress).run(iter_rows(f))
+        except ProductImportError as e:
+            raise CommandError(str(e))
+
+        for row, error in result.errors:
+            self.stderr.write(f'Row {row}: {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.rows} rows in {result.elapsed:.1f}s: {result.created} created, '
+            f'{result.updated} updated, {result.error_count} skipped'
+        ))
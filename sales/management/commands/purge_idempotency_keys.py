@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from sales.checkout import purge_expired_idempotency_keys
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired sale idempotency keys'
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_idempotency_keys()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired idempotency keys'))
@@ -0,0 +1,25 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sales.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the daily sales rollups from the sales table, for all days or a date range'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First day to rebuild (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Last day to rebuild (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['start']) if options['start'] else None
+            end = date.fromisoformat(options['end']) if options['end'] else None
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        summaries, products = rebuild_rollups(start, end)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {summaries} daily summaries and {products} daily product rows'
+        ))
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:03
+
+from django.db import migrations, models
+
+
+def seed_default_sequence(apps, schema_editor):
+    # Continue after the highest existing REC-NNNNNN receipt so legacy
+    # numbers stay valid and are never handed out again.
+    Sale = apps.get_model('sales', 'Sale')
+    ReceiptSequence = apps.get_model('sales', 'ReceiptSequence')
+    last_number = 0
+    for receipt_number in Sale.objects.filter(receipt_number__startswith='REC-').values_list('receipt_number', flat=True).iterator():
+        suffix = receipt_number[len('REC-'):]
+        if suffix.isdigit():
+            last_number = max(last_number, int(suffix))
+    ReceiptSequence.objects.get_or_create(prefix='REC', defaults={'next_value': last_number + 1})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0003_cashtransaction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReceiptSequence',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(help_text='Prefijo de recibo de la caja, ej. REC o CAJA2', max_length=10, unique=True, verbose_name='Prefijo')),
+                ('next_value', models.PositiveBigIntegerField(default=1, verbose_name='Siguiente Número')),
+            ],
+        ),
+        migrations.RunPython(seed_default_sequence, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0004_receiptsequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaleIdempotencyKey',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('sale', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='idempotency_key', to='sales.sale')),
+                ('salesperson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sale_idempotency_keys', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('salesperson', 'key'), name='unique_sale_idempotency_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0005_saleidempotencykey'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='last_updated',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Última Actualización'),
+        ),
+    ]
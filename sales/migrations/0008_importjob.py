@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0007_product_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to='imports/', verbose_name='Archivo')),
+                ('status', models.CharField(choices=[('PENDING', 'Pendiente'), ('RUNNING', 'En proceso'), ('DONE', 'Completado'), ('FAILED', 'Fallido')], default='PENDING', max_length=10, verbose_name='Estado')),
+                ('total_rows', models.PositiveIntegerField(blank=True, null=True, verbose_name='Filas Estimadas')),
+                ('rows_processed', models.PositiveIntegerField(default=0, verbose_name='Filas Procesadas')),
+                ('created', models.PositiveIntegerField(default=0, verbose_name='Creados')),
+                ('updated', models.PositiveIntegerField(default=0, verbose_name='Actualizados')),
+                ('error_count', models.PositiveIntegerField(default=0, verbose_name='Errores')),
+                ('errors', models.JSONField(blank=True, default=list, verbose_name='Detalle de Errores')),
+                ('message', models.TextField(blank=True, verbose_name='Mensaje')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha')),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+        ),
+    ]
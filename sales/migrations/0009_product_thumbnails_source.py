@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0008_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='thumbnails_source',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    Sale = apps.get_model('sales', 'Sale')
+    SaleItem = apps.get_model('sales', 'SaleItem')
+    DailySalesSummary = apps.get_model('sales', 'DailySalesSummary')
+    DailyProductSales = apps.get_model('sales', 'DailyProductSales')
+    DailySalesSummary.objects.bulk_create(
+        DailySalesSummary(day=row['day'], salesperson_id=row['salesperson'],
+                          sale_count=row['sale_count'], total_amount=row['total_amount'] or 0)
+        for row in Sale.objects.annotate(day=TruncDate('date_added')).values('day', 'salesperson')
+        .annotate(sale_count=Count('id'), total_amount=Sum('total_amount')).order_by()
+    )
+    DailyProductSales.objects.bulk_create(
+        (DailyProductSales(day=row['day'], salesperson_id=row['sale__salesperson'], product_id=row['product'],
+                           quantity=row['quantity'] or 0, total=row['total'] or 0)
+         for row in SaleItem.objects.annotate(day=TruncDate('sale__date_added'))
+         .values('day', 'sale__salesperson', 'product')
+         .annotate(quantity=Sum('quantity'), total=Sum('total')).order_by()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0009_product_thumbnails_source'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyProductSales',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Día')),
+                ('quantity', models.IntegerField(default=0, verbose_name='Cantidad')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total (BOB)')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='daily_sales', to='sales.product', verbose_name='Producto')),
+                ('salesperson', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='daily_product_sales', to=settings.AUTH_USER_MODEL, verbose_name='Vendedor')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'salesperson', 'product'), name='daily_product_sales_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailySalesSummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Día')),
+                ('sale_count', models.IntegerField(default=0, verbose_name='Ventas')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total (BOB)')),
+                ('salesperson', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='daily_sales', to=settings.AUTH_USER_MODEL, verbose_name='Vendedor')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'salesperson'), name='daily_sales_summary_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0010_daily_sales_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['-date_added', '-id'], name='sale_date_id_idx'),
+        ),
+    ]
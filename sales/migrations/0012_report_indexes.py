@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0011_sale_date_id_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cashtransaction',
+            index=models.Index(fields=['type', 'date'], name='cash_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['salesperson', '-date_added', '-id'], name='sale_salesperson_date_idx'),
+        ),
+    ]
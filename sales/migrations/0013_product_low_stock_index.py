@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0012_report_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('stock__lte', 10)), fields=['stock', 'name'], name='product_low_stock_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:35
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import UnaccentExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0013_product_low_stock_index'),
+    ]
+
+    operations = [
+        UnaccentExtension(),
+        # Spanish stemming applied after accent folding, so 'cafe' finds
+        # 'Café' and 'galleta' finds 'Galletas'.
+        migrations.RunSQL(
+            """
+            CREATE TEXT SEARCH CONFIGURATION spanish_unaccent (COPY = spanish);
+            ALTER TEXT SEARCH CONFIGURATION spanish_unaccent
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+            """,
+            'DROP TEXT SEARCH CONFIGURATION spanish_unaccent;',
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('name', config='spanish_unaccent', weight='A'), '||', django.contrib.postgres.search.SearchVector('barcode', config='simple', weight='B'), django.contrib.postgres.search.SearchConfig('spanish_unaccent')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='product_search_vector'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0014_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'stock'], name='product_category_stock_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0015_product_category_stock_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RejectedSale',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('idempotency_key', models.CharField(max_length=64, verbose_name='Clave')),
+                ('register', models.CharField(blank=True, max_length=20, verbose_name='Caja')),
+                ('items', models.JSONField(default=list, verbose_name='Productos')),
+                ('error', models.TextField(verbose_name='Motivo')),
+                ('queued_at', models.CharField(blank=True, max_length=40, verbose_name='Vendida (según la caja)')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Rechazada')),
+                ('resolved', models.BooleanField(default=False, verbose_name='Resuelta')),
+                ('salesperson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rejected_sales', to=settings.AUTH_USER_MODEL, verbose_name='Vendedor')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('salesperson', 'idempotency_key'), name='unique_rejected_sale_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 15:20
+
+from django.db import migrations
+
+
+def reset_thumbnails_source(apps, schema_editor):
+    # Thumbnail names now keep the image's extension, so the files written
+    # under the old names are no longer found. Registers get the original
+    # upload until generate_thumbnails writes the new ones.
+    Product = apps.get_model('sales', 'Product')
+    Product.objects.exclude(thumbnails_source='').update(thumbnails_source='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0017_importjob_heartbeat'),
+    ]
+
+    operations = [
+        migrations.RunPython(reset_thumbnails_source, migrations.RunPython.noop),
+    ]
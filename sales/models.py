@@ -1,5 +1,8 @@
 from django.db import models
+from django.db.models.functions import Upper
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.utils import timezone
 
 class Category(models.Model):
@@ -19,6 +22,14 @@ class ExchangeRate(models.Model):
     def __str__(self):
         return f"1 USD = {self.rate} BOB ({self.date_set.strftime('%Y-%m-%d %H:%M')})"
 
+# Products at or below this stock count as low; the partial index on
+# Product covers exactly these rows.
+LOW_STOCK_THRESHOLD = 10
+
+# Text search configuration for catalog search: Spanish stemming over
+# unaccented words, created in migration 0014.
+SEARCH_CONFIG = 'spanish_unaccent'
+
 class Product(models.Model):
     name = models.CharField(max_length=200, verbose_name="Nombre")
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name='products', verbose_name="Categoría")
@@ -27,12 +38,22 @@ class Product(models.Model):
     stock = models.IntegerField(default=0, verbose_name="Stock")
     barcode = models.CharField(max_length=100, blank=True, null=True, unique=True, verbose_name="Código de Barras")
     image = models.ImageField(upload_to='products/', blank=True, null=True, verbose_name="Imagen")
-    last_updated = models.DateTimeField(auto_now=True, verbose_name="Última Actualización")
+    # Image name the WebP thumbnails were generated from; see thumbnails.py.
+    thumbnails_source = models.CharField(max_length=100, blank=True, editable=False)
+    last_updated = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Última Actualización")
     price_usd = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True, help_text="Price in USD (Auto-calculated)", verbose_name="Precio (USD)")
+    # Maintained by PostgreSQL on every write, including the bulk import paths.
+    search_vector = models.GeneratedField(
+        expression=SearchVector('name', config=SEARCH_CONFIG, weight='A')
+        + SearchVector('barcode', config='simple', weight='B'),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
 
     def save(self, *args, **kwargs):
         # Calculate price_usd based on the latest ExchangeRate
-        latest_rate = ExchangeRate.objects.order_by('-date_set').first()
+        from .pricing import current_rate
+        latest_rate = current_rate()
         if latest_rate and self.price:
             self.price_usd = self.price / latest_rate.rate
         else:
@@ -40,9 +61,32 @@ class Product(models.Model):
         
         super().save(*args, **kwargs)
 
+    def thumbnail_url(self, size='md'):
+        from .thumbnails import thumbnail_url
+        return thumbnail_url(self.image.name, self.thumbnails_source, size)
+
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            # Trigram indexes serve the case-insensitive prefix and substring
+            # lookups of the POS search (Django emits UPPER(col) LIKE ...).
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='product_name_trgm'),
+            GinIndex(OpClass(Upper('barcode'), name='gin_trgm_ops'), name='product_barcode_trgm'),
+            # Trigrams cannot narrow one- or two-letter terms; those are
+            # matched by prefix on these instead.
+            models.Index(OpClass(Upper('name'), name='text_pattern_ops'), name='product_name_prefix'),
+            models.Index(OpClass(Upper('barcode'), name='text_pattern_ops'), name='product_barcode_prefix'),
+            # Full-text search of the public catalog.
+            GinIndex(fields=['search_vector'], name='product_search_vector'),
+            # Category pages of the public catalog, which list in-stock products.
+            models.Index(fields=['category', 'stock'], name='product_category_stock_idx'),
+            # Low- and out-of-stock views of the inventory report; a small
+            # index even with a large catalog, since most SKUs are in stock.
+            models.Index(fields=['stock', 'name'], condition=models.Q(stock__lte=LOW_STOCK_THRESHOLD), name='product_low_stock_idx'),
+        ]
+
 class Sale(models.Model):
     salesperson = models.ForeignKey(User, on_delete=models.PROTECT, related_name='sales')
     date_added = models.DateTimeField(auto_now_add=True)
@@ -51,17 +95,65 @@ class Sale(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.receipt_number:
-            # Simple receipt number generation (can be improved)
-            last_sale = Sale.objects.all().order_by('id').last()
-            if last_sale:
-                self.receipt_number = f"REC-{last_sale.id + 1:06d}"
-            else:
-                self.receipt_number = "REC-000001"
+            from .receipts import allocate_receipt_number
+            self.receipt_number = allocate_receipt_number()
         super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Sale {self.receipt_number} by {self.salesperson.username}"
 
+    class Meta:
+        indexes = [
+            # Report date ranges and the sales report's keyset pagination
+            # both walk (date_added, id); the second serves them per salesperson.
+            models.Index(fields=['-date_added', '-id'], name='sale_date_id_idx'),
+            models.Index(fields=['salesperson', '-date_added', '-id'], name='sale_salesperson_date_idx'),
+        ]
+
+class ReceiptSequence(models.Model):
+    prefix = models.CharField(max_length=10, unique=True, verbose_name="Prefijo", help_text="Prefijo de recibo de la caja, ej. REC o CAJA2")
+    next_value = models.PositiveBigIntegerField(default=1, verbose_name="Siguiente Número")
+
+    def __str__(self):
+        return f"{self.prefix}-{self.next_value:06d}"
+
+class SaleIdempotencyKey(models.Model):
+    key = models.CharField(max_length=64)
+    salesperson = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sale_idempotency_keys')
+    sale = models.OneToOneField(Sale, on_delete=models.CASCADE, related_name='idempotency_key')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['salesperson', 'key'], name='unique_sale_idempotency_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} -> {self.sale.receipt_number}"
+
+class RejectedSale(models.Model):
+    """
+    A sale an offline register queued but the server refused (stock
+    conflict, unknown product or register). The customer has usually paid
+    already, so it is kept here until an admin resolves it by hand.
+    """
+    salesperson = models.ForeignKey(User, on_delete=models.CASCADE, related_name='rejected_sales', verbose_name="Vendedor")
+    idempotency_key = models.CharField(max_length=64, verbose_name="Clave")
+    register = models.CharField(max_length=20, blank=True, verbose_name="Caja")
+    items = models.JSONField(default=list, verbose_name="Productos")
+    error = models.TextField(verbose_name="Motivo")
+    queued_at = models.CharField(max_length=40, blank=True, verbose_name="Vendida (según la caja)")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Rechazada")
+    resolved = models.BooleanField(default=False, verbose_name="Resuelta")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['salesperson', 'idempotency_key'], name='unique_rejected_sale_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.idempotency_key} ({self.salesperson.username}): {self.error}"
+
 class SaleItem(models.Model):
     sale = models.ForeignKey(Sale, on_delete=models.CASCADE, related_name='items')
     product = models.ForeignKey(Product, on_delete=models.PROTECT)
@@ -120,3 +212,76 @@ class CashTransaction(models.Model):
 
     def __str__(self):
         return f"{self.get_type_display()}: {self.description} - {self.amount} BOB"
+
+    class Meta:
+        indexes = [
+            # Cash in/out totals of the financial report filter by type and date range.
+            models.Index(fields=['type', 'date'], name='cash_type_date_idx'),
+        ]
+
+class DailySalesSummary(models.Model):
+    """Sales per day and salesperson, maintained by sales.rollups."""
+    day = models.DateField(verbose_name="Día")
+    salesperson = models.ForeignKey(User, on_delete=models.PROTECT, related_name='daily_sales', verbose_name="Vendedor")
+    sale_count = models.IntegerField(default=0, verbose_name="Ventas")
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Total (BOB)")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'salesperson'], name='daily_sales_summary_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.salesperson}: {self.total_amount} BOB"
+
+class DailyProductSales(models.Model):
+    """Units and revenue per day, salesperson and product, maintained by sales.rollups."""
+    day = models.DateField(verbose_name="Día")
+    salesperson = models.ForeignKey(User, on_delete=models.PROTECT, related_name='daily_product_sales', verbose_name="Vendedor")
+    product = models.ForeignKey(Product, on_delete=models.PROTECT, related_name='daily_sales', verbose_name="Producto")
+    quantity = models.IntegerField(default=0, verbose_name="Cantidad")
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Total (BOB)")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'salesperson', 'product'], name='daily_product_sales_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.product}: {self.quantity}"
+
+class ImportJob(models.Model):
+    STATUS_CHOICES = [
+        ('PENDING', 'Pendiente'),
+        ('RUNNING', 'En proceso'),
+        ('DONE', 'Completado'),
+        ('FAILED', 'Fallido'),
+    ]
+
+    file = models.FileField(upload_to='imports/', verbose_name="Archivo")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING', verbose_name="Estado")
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, verbose_name="Usuario")
+    total_rows = models.PositiveIntegerField(null=True, blank=True, verbose_name="Filas Estimadas")
+    rows_processed = models.PositiveIntegerField(default=0, verbose_name="Filas Procesadas")
+    created = models.PositiveIntegerField(default=0, verbose_name="Creados")
+    updated = models.PositiveIntegerField(default=0, verbose_name="Actualizados")
+    error_count = models.PositiveIntegerField(default=0, verbose_name="Errores")
+    errors = models.JSONField(default=list, blank=True, verbose_name="Detalle de Errores")
+    message = models.TextField(blank=True, verbose_name="Mensaje")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha")
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Stamped with every progress update; a running job that stops
+    # advancing lost its worker. See import_jobs.fail_orphaned_jobs().
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    def eta_seconds(self):
+        """Seconds left at the current pace, or None when it cannot be estimated."""
+        if self.status != 'RUNNING' or not self.started_at or not self.rows_processed or not self.total_rows:
+            return None
+        elapsed = (timezone.now() - self.started_at).total_seconds()
+        remaining = max(self.total_rows - self.rows_processed, 0)
+        return round(elapsed / self.rows_processed * remaining)
+
+    def __str__(self):
+        return f"Importación #{self.pk} ({self.get_status_display()})"
@@ -0,0 +1,198 @@
+import gzip
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db.models import Case, Count, IntegerField, Max, Q, Value, When
+
+from .cache import bump, count, generation
+from .models import Product
+from .thumbnails import thumbnail_url
+
+POS_PRODUCT_FIELDS = ('id', 'name', 'price', 'stock', 'category__name', 'barcode', 'image', 'thumbnails_source')
+# Product cards on the register are about 200px wide; 'md' stays sharp on HiDPI.
+POS_THUMBNAIL_SIZE = 'md'
+# Rows whose transaction commits after a later timestamp was already served
+# are re-sent on the next pull instead of being missed.
+FEED_LOOKBACK = timedelta(seconds=30)
+
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 50
+# Shorter terms are matched by prefix only; trigrams need three characters.
+SEARCH_SUBSTRING_MIN_LENGTH = 3
+
+CACHE_PREFIX = 'pos_catalog'
+CACHE_TIMEOUT = 60 * 60
+# The generation lives in the per-process cache, so a sale or edit committed
+# through another worker never moves it here. The catalog state is therefore
+# re-read at least this often, and the full feed is keyed by it as well.
+STATE_MAX_AGE = 10
+GENERATION_KEY = f'{CACHE_PREFIX}:generation'
+
+
+def pos_product_dict(row):
+    """Shape a Product .values() row the way the POS JavaScript expects it."""
+    return {
+        'id': row['id'],
+        'name': row['name'],
+        'price': float(row['price']),
+        'stock': row['stock'],
+        'category': row['category__name'] or 'Sin Categoría',
+        'barcode': row['barcode'],
+        'image_url': thumbnail_url(row['image'], row['thumbnails_source'], POS_THUMBNAIL_SIZE),
+    }
+
+
+def encode_version(last_updated):
+    """Catalog version token: microseconds since the epoch of the newest change."""
+    if last_updated is None:
+        return '0'
+    return str(int(last_updated.timestamp() * 1_000_000))
+
+
+def decode_version(token):
+    """Inverse of encode_version(). Returns None for a missing or invalid token."""
+    try:
+        micros = int(token)
+    except (TypeError, ValueError):
+        return None
+    if micros <= 0:
+        return None
+    return datetime.fromtimestamp(micros / 1_000_000, tz=dt_timezone.utc)
+
+
+def catalog_state():
+    """
+    Current catalog version and in-stock product count, in one aggregate query.
+
+    The count lets registers notice deletions, which leave no row behind to
+    advance the version.
+    """
+    state = Product.objects.aggregate(
+        last_updated=Max('last_updated'),
+        in_stock=Count('id', filter=Q(stock__gt=0)),
+    )
+    return encode_version(state['last_updated']), state['in_stock']
+
+
+def build_product_feed(since=None, state=None):
+    """
+    Products for the POS register.
+
+    Without `since` (or with an unreadable one) this is the full in-stock
+    catalog. Otherwise it holds every product changed since that version,
+    including ones that ran out of stock, which the register should drop.
+    """
+    version, in_stock = state or catalog_state()
+    since_dt = decode_version(since)
+
+    if since_dt is None:
+        rows = Product.objects.filter(stock__gt=0)
+    else:
+        rows = Product.objects.filter(last_updated__gte=since_dt - FEED_LOOKBACK)
+
+    return {
+        'version': version,
+        'full': since_dt is None,
+        'in_stock': in_stock,
+        'products': [pos_product_dict(row) for row in rows.order_by('name').values(*POS_PRODUCT_FIELDS)],
+    }
+
+
+def search_products(term, limit=SEARCH_DEFAULT_LIMIT):
+    """
+    In-stock products whose name or barcode contains `term`, best match first:
+    exact barcode, barcode prefix, name prefix, then any substring.
+
+    Substring lookups are served by the trigram indexes on UPPER(name) and
+    UPPER(barcode), and short prefix lookups by the text_pattern_ops
+    indexes, so latency does not grow with the catalog.
+    """
+    term = term.strip()
+    if not term:
+        return []
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+
+    if len(term) < SEARCH_SUBSTRING_MIN_LENGTH:
+        matches = Q(name__istartswith=term) | Q(barcode__istartswith=term)
+    else:
+        matches = Q(name__icontains=term) | Q(barcode__icontains=term)
+
+    rows = (
+        Product.objects
+        .filter(stock__gt=0)
+        .filter(matches)
+        .annotate(rank=Case(
+            When(barcode__iexact=term, then=Value(0)),
+            When(barcode__istartswith=term, then=Value(1)),
+            When(name__istartswith=term, then=Value(2)),
+            default=Value(3),
+            output_field=IntegerField(),
+        ))
+        .order_by('rank', 'name')
+        .values(*POS_PRODUCT_FIELDS)[:limit]
+    )
+    return [pos_product_dict(row) for row in rows]
+
+
+def feed_etag(state, since=None):
+    version, in_stock = state
+    return f'"{version}-{in_stock}-{since or "full"}"'
+
+
+def catalog_generation():
+    """
+    Counter bumped on every catalog change; cached entries are keyed by it,
+    so invalidating never has to find and delete old entries.
+    """
+    return generation(GENERATION_KEY)
+
+
+def invalidate_catalog_cache():
+    bump(GENERATION_KEY)
+
+
+def cache_stats():
+    """Hit and miss counters of the shared full-catalog payload."""
+    hits = cache.get(f'{CACHE_PREFIX}:hits', 0)
+    misses = cache.get(f'{CACHE_PREFIX}:misses', 0)
+    lookups = hits + misses
+    return {
+        'generation': catalog_generation(),
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / lookups, 4) if lookups else None,
+    }
+
+
+def cached_catalog_state():
+    """
+    catalog_state(), computed once per catalog generation and at most
+    STATE_MAX_AGE seconds old.
+    """
+    key = f'{CACHE_PREFIX}:state:{catalog_generation()}'
+    state = cache.get(key)
+    if state is None:
+        state = catalog_state()
+        cache.set(key, state, STATE_MAX_AGE)
+    return state
+
+
+def cached_full_feed():
+    """
+    The full POS catalog as (etag, gzip-compressed JSON), built once per
+    catalog generation and catalog state, and shared by every register.
+    """
+    state = cached_catalog_state()
+    version, in_stock = state
+    key = f'{CACHE_PREFIX}:full:{catalog_generation()}:{version}-{in_stock}'
+    entry = cache.get(key)
+    if entry is not None:
+        count(f'{CACHE_PREFIX}:hits')
+        return entry
+
+    count(f'{CACHE_PREFIX}:misses')
+    body = json.dumps(build_product_feed(None, state)).encode()
+    entry = (feed_etag(state), gzip.compress(body))
+    cache.set(key, entry, CACHE_TIMEOUT)
+    return entry
@@ -0,0 +1,103 @@
+import threading
+import time
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Round
+from django.utils import timezone
+
+from .cache import bump, generation
+from .models import ExchangeRate, Product
+from .pos_catalog import invalidate_catalog_cache
+
+RATE_GENERATION_KEY = 'exchange_rate:generation'
+# How often a worker checks the rate generation in the cache.
+STALE_CHECK_INTERVAL = 1.0
+# CACHES is a per-process LocMemCache, so a rate saved through another
+# worker never moves this worker's generation; the rate is re-read from the
+# database at least this often regardless.
+RATE_MAX_AGE = 60.0
+
+
+class CurrentRateProvider:
+    """
+    Per-process cache of the latest ExchangeRate.
+
+    A new rate invalidates it in the worker that saved it right away. Other
+    workers pick it up within RATE_MAX_AGE; with a shared cache backend the
+    generation counter makes that STALE_CHECK_INTERVAL.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rate = None
+        self._loaded = False
+        self._loaded_until = 0.0
+        self._generation = None
+        self._next_check = 0.0
+        self.queries = 0
+        self.queries_saved = 0
+
+    def get(self):
+        """The latest ExchangeRate, or None if no rate was ever set."""
+        with self._lock:
+            now = time.monotonic()
+            if now >= self._next_check:
+                self._next_check = now + STALE_CHECK_INTERVAL
+                current = generation(RATE_GENERATION_KEY)
+                if current != self._generation:
+                    self._generation = current
+                    self._loaded = False
+
+            if self._loaded and now < self._loaded_until:
+                self.queries_saved += 1
+                return self._rate
+
+            self._rate = ExchangeRate.objects.order_by('-date_set').first()
+            self._loaded = True
+            self._loaded_until = now + RATE_MAX_AGE
+            self.queries += 1
+            return self._rate
+
+    def invalidate(self, shared=True):
+        with self._lock:
+            self._loaded = False
+        if shared:
+            bump(RATE_GENERATION_KEY)
+
+    def stats(self):
+        return {
+            'rate': str(self._rate.rate) if self._loaded and self._rate else None,
+            'queries': self.queries,
+            'queries_saved': self.queries_saved,
+        }
+
+
+rate_provider = CurrentRateProvider()
+
+
+def current_rate():
+    return rate_provider.get()
+
+
+def reprice_products(rate):
+    """
+    Recompute BOB prices from USD prices at a new exchange rate with a
+    single UPDATE, keeping price_usd consistent with the rounded price.
+
+    Products without a USD price are left alone, as before. Returns
+    (rows_changed, seconds_taken).
+    """
+    start = time.perf_counter()
+    new_price = Round(F('price_usd') * rate, 2)
+    with transaction.atomic():
+        # Both right-hand sides read the pre-update row, so price_usd is
+        # derived from the same rounded price that is being written.
+        updated = Product.objects.filter(price_usd__gt=0).update(
+            price=new_price,
+            price_usd=Round(new_price / rate, 2),
+            last_updated=timezone.now(),
+        )
+        # update() sends no post_save, so invalidate the POS catalog here.
+        transaction.on_commit(invalidate_catalog_cache)
+    return updated, time.perf_counter() - start
@@ -0,0 +1,69 @@
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import ReceiptSequence
+
+DEFAULT_PREFIX = getattr(settings, 'RECEIPT_DEFAULT_PREFIX', 'REC')
+BLOCK_SIZE = getattr(settings, 'RECEIPT_BLOCK_SIZE', 20)
+
+# prefix -> [next number to hand out, end of block (exclusive)]
+_blocks = {}
+_lock = threading.Lock()
+
+
+def format_receipt_number(prefix, number):
+    return f"{prefix}-{number:06d}"
+
+
+def _reserve_block(prefix, size):
+    """
+    Reserve `size` numbers for this process from the register's counter row.
+
+    Called outside a transaction, the row lock only lasts for this short
+    update, so registers never wait on each other's checkouts, and each
+    process touches the row once per block instead of once per sale.
+    """
+    with transaction.atomic():
+        sequence = ReceiptSequence.objects.select_for_update().get(prefix=prefix)
+        start = sequence.next_value
+        sequence.next_value = start + size
+        sequence.save(update_fields=['next_value'])
+    return [start, start + size]
+
+
+def reserve_receipt_numbers(count, prefix=DEFAULT_PREFIX):
+    """
+    Replace this process's block for `prefix` with `count` fresh numbers.
+
+    For callers that will allocate inside a transaction and want the
+    numbers to come from the cached block, as they do in production.
+    Must be called outside a transaction; unused numbers are skipped.
+    """
+    block = _reserve_block(prefix, count)
+    with _lock:
+        _blocks[prefix] = block
+
+
+def allocate_receipt_number(prefix=DEFAULT_PREFIX):
+    """
+    Hand out the next receipt number for a register prefix, e.g. REC-000124.
+
+    Numbers are unique but only increase per process, so receipts from
+    different workers interleave and unused numbers in a block are skipped
+    when a worker restarts. Raises ReceiptSequence.DoesNotExist for an
+    unknown prefix.
+    """
+    with _lock:
+        block = _blocks.get(prefix)
+        if block is None or block[0] >= block[1]:
+            if connection.in_atomic_block:
+                # The reservation would roll back with the caller's
+                # transaction, so never cache numbers beyond this one.
+                block = _reserve_block(prefix, 1)
+            else:
+                block = _blocks[prefix] = _reserve_block(prefix, BLOCK_SIZE)
+        number = block[0]
+        block[0] += 1
+    return format_receipt_number(prefix, number)
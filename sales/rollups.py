@@ -0,0 +1,92 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, IntegerField, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import DailyProductSales, DailySalesSummary, Sale, SaleItem
+
+# Sent after rebuild_rollups() rewrote rows, for caches built on the rollups.
+rollups_rebuilt = Signal()
+
+
+def record_sale(sale, lines, sign=1):
+    """
+    Add a sale to the daily rollups; call inside the sale's transaction.
+
+    `lines` are (product_id, quantity, line_total) tuples. Rows are created
+    empty if missing and then incremented in place, so concurrent sales on
+    the same day never overwrite each other. Pass sign=-1 to take a sale
+    back out.
+    """
+    day = timezone.localdate(sale.date_added)
+    by_product = defaultdict(lambda: [0, Decimal('0')])
+    for product_id, quantity, line_total in lines:
+        by_product[product_id][0] += quantity
+        by_product[product_id][1] += line_total
+
+    DailySalesSummary.objects.bulk_create(
+        [DailySalesSummary(day=day, salesperson_id=sale.salesperson_id)], ignore_conflicts=True,
+    )
+    DailySalesSummary.objects.filter(day=day, salesperson_id=sale.salesperson_id).update(
+        sale_count=F('sale_count') + sign,
+        total_amount=F('total_amount') + sign * sale.total_amount,
+    )
+    if not by_product:
+        return
+
+    DailyProductSales.objects.bulk_create(
+        [DailyProductSales(day=day, salesperson_id=sale.salesperson_id, product_id=pk) for pk in by_product],
+        ignore_conflicts=True,
+    )
+    DailyProductSales.objects.filter(
+        day=day, salesperson_id=sale.salesperson_id, product_id__in=by_product,
+    ).update(
+        quantity=F('quantity') + Case(
+            *[When(product_id=pk, then=Value(sign * q)) for pk, (q, _) in by_product.items()],
+            output_field=IntegerField(),
+        ),
+        total=F('total') + Case(
+            *[When(product_id=pk, then=Value(sign * t)) for pk, (_, t) in by_product.items()],
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        ),
+    )
+
+
+@transaction.atomic
+def rebuild_rollups(start=None, end=None):
+    """
+    Recompute the rollups from Sale and SaleItem for days in [start, end]
+    (either bound may be None). Returns the number of summary and product rows.
+    """
+    summaries = DailySalesSummary.objects.all()
+    products = DailyProductSales.objects.all()
+    sales = Sale.objects.annotate(day=TruncDate('date_added'))
+    items = SaleItem.objects.annotate(day=TruncDate('sale__date_added'))
+    if start:
+        summaries, products = summaries.filter(day__gte=start), products.filter(day__gte=start)
+        sales, items = sales.filter(day__gte=start), items.filter(day__gte=start)
+    if end:
+        summaries, products = summaries.filter(day__lte=end), products.filter(day__lte=end)
+        sales, items = sales.filter(day__lte=end), items.filter(day__lte=end)
+    summaries.delete()
+    products.delete()
+
+    summary_rows = DailySalesSummary.objects.bulk_create(
+        DailySalesSummary(day=row['day'], salesperson_id=row['salesperson'],
+                          sale_count=row['sale_count'], total_amount=row['total_amount'] or 0)
+        for row in sales.values('day', 'salesperson').annotate(
+            sale_count=Count('id'), total_amount=Sum('total_amount')).order_by()
+    )
+    product_rows = DailyProductSales.objects.bulk_create(
+        (DailyProductSales(day=row['day'], salesperson_id=row['sale__salesperson'], product_id=row['product'],
+                           quantity=row['quantity'] or 0, total=row['total'] or 0)
+         for row in items.values('day', 'sale__salesperson', 'product').annotate(
+             quantity=Sum('quantity'), total=Sum('total')).order_by()),
+        batch_size=1000,
+    )
+    rollups_rebuilt.send(sender=DailySalesSummary, start=start, end=end)
+    return len(summary_rows), len(product_rows)
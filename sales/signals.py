@@ -0,0 +1,55 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .barcodes import barcode_index
+from .models import Category, ExchangeRate, Product, Sale
+from .pos_catalog import invalidate_catalog_cache
+from .pricing import rate_provider
+from .rollups import record_sale
+from .thumbnails import enqueue_thumbnails
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_pos_catalog(sender, **kwargs):
+    # Wait for commit so no register caches data that may still roll back.
+    transaction.on_commit(invalidate_catalog_cache)
+    transaction.on_commit(barcode_index.mark_stale)
+
+
+@receiver(post_save, sender=Product)
+def queue_product_thumbnails(sender, instance, **kwargs):
+    if instance.image and instance.image.name != instance.thumbnails_source:
+        enqueue_thumbnails(instance.pk)
+
+
+@receiver(post_delete, sender=Product)
+def remove_deleted_barcode(sender, instance, **kwargs):
+    product_id = instance.pk
+    transaction.on_commit(lambda: barcode_index.remove(product_id))
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def touch_category_products(sender, instance, **kwargs):
+    # The POS feed versions products by last_updated, so a renamed or deleted
+    # category has to mark its products as changed for registers to see it.
+    Product.objects.filter(category=instance).update(last_updated=timezone.now())
+    transaction.on_commit(invalidate_catalog_cache)
+
+
+@receiver(post_save, sender=ExchangeRate)
+@receiver(post_delete, sender=ExchangeRate)
+def invalidate_current_rate(sender, **kwargs):
+    # Drop this worker's copy now so saves later in the same transaction use
+    # the new rate; tell the other workers once it is committed.
+    rate_provider.invalidate(shared=False)
+    transaction.on_commit(rate_provider.invalidate)
+
+
+@receiver(pre_delete, sender=Sale)
+def remove_sale_from_rollups(sender, instance, **kwargs):
+    # Runs before the cascade removes the lines, so they can still be read.
+    record_sale(instance, instance.items.values_list('product_id', 'quantity', 'total'), sign=-1)
@@ -0,0 +1,9 @@
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def thumbnail(product, size='md'):
+    """{{ product|thumbnail:'sm' }}: URL of a product image thumbnail."""
+    return product.thumbnail_url(size)
@@ -0,0 +1,106 @@
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels of each generated size.
+THUMBNAIL_SIZES = {'sm': 64, 'md': 320, 'lg': 640}
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_WORKERS = getattr(settings, 'THUMBNAIL_WORKERS', 2)
+
+_executor = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS, thread_name_prefix='thumbnails')
+
+
+def thumbnail_name(image_name, size):
+    """
+    Storage name of one size of an image, e.g. thumbnails/products/a.jpg-320.webp.
+
+    The original extension stays in the name, so a.jpg and a.png never
+    share, and overwrite, each other's thumbnails.
+    """
+    return f'thumbnails/{image_name}-{THUMBNAIL_SIZES[size]}.webp'
+
+
+def thumbnail_url(image_name, thumbnails_source, size):
+    """
+    URL of the `size` thumbnail, or of the original upload while the
+    thumbnails for this image have not been generated yet.
+    """
+    if not image_name:
+        return ''
+    if thumbnails_source == image_name:
+        return default_storage.url(thumbnail_name(image_name, size))
+    return default_storage.url(image_name)
+
+
+def render_thumbnails(image_file):
+    """WebP bytes of every size in THUMBNAIL_SIZES, keyed by size."""
+    from PIL import Image, ImageOps
+
+    with Image.open(image_file) as image:
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+        rendered = {}
+        for size, edge in THUMBNAIL_SIZES.items():
+            thumb = image.copy()
+            thumb.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            thumb.save(buffer, 'WEBP', quality=THUMBNAIL_QUALITY, method=4)
+            rendered[size] = buffer.getvalue()
+    return rendered
+
+
+def generate_thumbnails(product_id):
+    """
+    Write the thumbnails of a product's current image and mark them ready.
+
+    Returns False if the product is gone or has no image. The product row is
+    only marked if its image did not change meanwhile.
+    """
+    from .pos_catalog import invalidate_catalog_cache
+
+    image_name = Product.objects.filter(pk=product_id).values_list('image', flat=True).first()
+    if not image_name:
+        return False
+
+    with default_storage.open(image_name, 'rb') as f:
+        rendered = render_thumbnails(f)
+    for size, data in rendered.items():
+        name = thumbnail_name(image_name, size)
+        # Storage would pick a new name instead of overwriting.
+        default_storage.delete(name)
+        default_storage.save(name, ContentFile(data))
+
+    # .update() sends no post_save, so nothing re-queues this product; bump
+    # last_updated so registers pick up the new image URL.
+    marked = Product.objects.filter(pk=product_id, image=image_name).update(
+        thumbnails_source=image_name, last_updated=timezone.now(),
+    )
+    if marked:
+        invalidate_catalog_cache()
+    return True
+
+
+def _run(product_id):
+    close_old_connections()
+    try:
+        generate_thumbnails(product_id)
+    except Exception:
+        # The executor would keep the exception on a future nobody reads.
+        logger.exception('Could not generate thumbnails for product %s; it keeps showing the original image.', product_id)
+    finally:
+        connection.close()
+
+
+def enqueue_thumbnails(product_id):
+    """Generate thumbnails in the worker pool once the current transaction commits."""
+    transaction.on_commit(lambda: _executor.submit(_run, product_id))
@@ -4,17 +4,27 @@ from . import views
 urlpatterns = [
     path('products/', views.ProductListView.as_view(), name='product_list'),
     path('products/import/', views.ImportProductsView.as_view(), name='import_products'),
+    path('products/import/<int:pk>/', views.ImportJobView.as_view(), name='import_job'),
+    path('products/import/<int:pk>/status/', views.import_job_status, name='import_job_status'),
+    path('products/export/', views.export_products_csv, name='export_products'),
     path('products/add/', views.ProductCreateView.as_view(), name='product_add'),
     path('products/<int:pk>/edit/', views.ProductUpdateView.as_view(), name='product_edit'),
     path('products/<int:pk>/delete/', views.ProductDeleteView.as_view(), name='product_delete'),
     path('products/<int:pk>/stock/', views.StockMovementCreateView.as_view(), name='stock_movement_add'),
     path('config/exchange-rate/', views.ExchangeRateView.as_view(), name='exchange_rate'),
+    path('config/exchange-rate/stats/', views.ExchangeRateCacheStatsView.as_view(), name='exchange_rate_cache_stats'),
     path('categories/', views.CategoryListView.as_view(), name='category_list'),
     path('categories/add/', views.CategoryCreateView.as_view(), name='category_add'),
     path('categories/<int:pk>/edit/', views.CategoryUpdateView.as_view(), name='category_edit'),
     path('categories/<int:pk>/delete/', views.CategoryDeleteView.as_view(), name='category_delete'),
     path('pos/', views.POSView.as_view(), name='pos'),
+    path('api/products/feed/', views.pos_product_feed, name='pos_product_feed'),
+    path('api/products/search/', views.pos_product_search, name='pos_product_search'),
+    path('api/products/barcode/stats/', views.BarcodeLookupStatsView.as_view(), name='barcode_lookup_stats'),
+    path('api/products/barcode/<str:barcode>/', views.pos_barcode_lookup, name='pos_barcode_lookup'),
+    path('api/products/feed/stats/', views.POSCatalogCacheStatsView.as_view(), name='pos_catalog_cache_stats'),
     path('api/sales/create/', views.create_sale, name='create_sale'),
+    path('api/sales/sync/', views.sync_sales, name='sync_sales'),
     path('receipt/<str:receipt_number>/', views.ReceiptView.as_view(), name='receipt'),
     path('cash-transaction/add/', views.CashTransactionCreateView.as_view(), name='add_cash_transaction'),
 ]
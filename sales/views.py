@@ -1,19 +1,30 @@
-from .models import Product, StockMovement, ExchangeRate, Category, Sale, SaleItem, CashTransaction
+from .models import Product, StockMovement, ExchangeRate, Category, Sale, SaleItem, CashTransaction, ImportJob, ReceiptSequence
 from .forms import StockMovementForm, ExchangeRateForm, CategoryForm, CashTransactionForm
+from .checkout import submit_sale, submit_sale_batch
+from .receipts import DEFAULT_PREFIX
+from .barcodes import barcode_index
+from .pricing import current_rate, rate_provider, reprice_products
+from .import_jobs import enqueue_import, fail_orphaned_jobs
+from .importers import file_format
+from .exporters import iter_products_csv
+from users.roles import AdminRequiredMixin, is_admin
+from .pos_catalog import (
+    build_product_feed, cache_stats, cached_catalog_state, cached_full_feed,
+    decode_version, encode_version, feed_etag, search_products, SEARCH_DEFAULT_LIMIT,
+)
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib import messages
-from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.views.generic import ListView, CreateView, UpdateView, DeleteView, TemplateView, DetailView
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.views.generic import ListView, CreateView, UpdateView, DeleteView, TemplateView, DetailView, View
 from django.urls import reverse_lazy
-from django.http import JsonResponse
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.utils.http import parse_etags
+from django.utils import timezone
 from django.db import transaction
 from django.contrib.auth.decorators import login_required
+import gzip
 import json
 
-class AdminRequiredMixin(UserPassesTestMixin):
-    def test_func(self):
-        return self.request.user.is_superuser or self.request.user.groups.filter(name='Admin').exists()
-
 class ProductListView(LoginRequiredMixin, AdminRequiredMixin, ListView):
     model = Product
     template_name = 'sales/product_list.html'
@@ -67,24 +78,24 @@ class ExchangeRateView(LoginRequiredMixin, AdminRequiredMixin, CreateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['current_rate'] = ExchangeRate.objects.order_by('-date_set').first()
+        context['current_rate'] = current_rate()
         return context
 
     def form_valid(self, form):
-        response = super().form_valid(form)
-        new_rate = form.instance.rate
-        
-        # Bulk update product prices
-        products_updated = 0
-        for product in Product.objects.all():
-            if product.price_usd:
-                product.price = product.price_usd * new_rate
-                product.save()
-                products_updated += 1
-        
-        messages.success(self.request, f'Tipo de cambio actualizado a {new_rate}. Se recalcularon los precios de {products_updated} productos.')
+        with transaction.atomic():
+            response = super().form_valid(form)
+            new_rate = form.instance.rate
+
+            # Bulk update product prices
+            products_updated, elapsed = reprice_products(new_rate)
+
+        messages.success(self.request, f'Tipo de cambio actualizado a {new_rate}. Se recalcularon los precios de {products_updated} productos en {elapsed:.2f} s.')
         return response
 
+class ExchangeRateCacheStatsView(LoginRequiredMixin, AdminRequiredMixin, View):
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(rate_provider.stats())
+
 class CategoryListView(LoginRequiredMixin, AdminRequiredMixin, ListView):
     model = Category
     template_name = 'sales/category_list.html'
@@ -109,26 +120,72 @@ class CategoryDeleteView(LoginRequiredMixin, AdminRequiredMixin, DeleteView):
     success_url = reverse_lazy('category_list')
 
 class POSView(LoginRequiredMixin, TemplateView):
+    # Products are loaded by the page from pos_product_feed and kept in localStorage
     template_name = 'sales/pos.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Serialize products for JS
-        products = Product.objects.filter(stock__gt=0).select_related('category')
-        products_data = []
-        for p in products:
-            products_data.append({
-                'id': p.id,
-                'name': p.name,
-                'price': float(p.price),
-                'stock': p.stock,
-                'category': p.category.name if p.category else 'Sin Categoría',
-                'barcode': p.barcode,
-                'image_url': p.image.url if p.image else '',
-            })
-        context['products_json'] = json.dumps(products_data)
+        # Each till picks its receipt prefix once; the page remembers it.
+        context['registers'] = ReceiptSequence.objects.order_by('prefix').values_list('prefix', flat=True)
+        context['default_register'] = DEFAULT_PREFIX
         return context
 
+@login_required
+def pos_product_feed(request):
+    """Full or incremental POS catalog, with ETag support for cheap polling."""
+    since_dt = decode_version(request.GET.get('since'))
+    since = encode_version(since_dt) if since_dt else None
+
+    if since is None:
+        # Shared, pre-compressed payload; a cache hit queries at most the
+        # catalog state, once per STATE_MAX_AGE.
+        etag, compressed = cached_full_feed()
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        elif 'gzip' in request.headers.get('Accept-Encoding', ''):
+            response = HttpResponse(compressed, content_type='application/json')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(gzip.decompress(compressed), content_type='application/json')
+        response['Vary'] = 'Accept-Encoding'
+    else:
+        state = cached_catalog_state()
+        etag = feed_etag(state, since)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = JsonResponse(build_product_feed(since, state))
+
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+@login_required
+def pos_product_search(request):
+    """Ranked name/barcode search for the POS, limited to in-stock products."""
+    try:
+        limit = int(request.GET.get('limit', SEARCH_DEFAULT_LIMIT))
+    except ValueError:
+        limit = SEARCH_DEFAULT_LIMIT
+    results = search_products(request.GET.get('q', ''), limit)
+    return JsonResponse({'results': results})
+
+@login_required
+def pos_barcode_lookup(request, barcode):
+    """Resolve a scanned barcode to its POS product."""
+    product = barcode_index.lookup(barcode)
+    if product is None:
+        return JsonResponse({'error': 'Producto no encontrado.'}, status=404)
+    return JsonResponse({'product': product})
+
+class BarcodeLookupStatsView(LoginRequiredMixin, AdminRequiredMixin, View):
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(barcode_index.stats())
+
+class POSCatalogCacheStatsView(LoginRequiredMixin, AdminRequiredMixin, View):
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(cache_stats())
+
 @login_required
 def create_sale(request):
     if request.method == 'POST':
@@ -139,46 +196,14 @@ def create_sale(request):
             if not items:
                 return JsonResponse({'success': False, 'error': 'El carrito está vacío.'})
 
-            with transaction.atomic():
-                # Create Sale
-                sale = Sale.objects.create(
-                    salesperson=request.user,
-                    total_amount=0 # Will calculate
-                )
-                
-                total_amount = 0
-                
-                for item in items:
-                    product_id = item.get('id')
-                    quantity = int(item.get('quantity', 0))
-                    price = float(item.get('price', 0)) # Editable price
-                    
-                    if quantity <= 0:
-                        continue
-                        
-                    product = Product.objects.select_for_update().get(pk=product_id)
-                    
-                    if product.stock < quantity:
-                        raise ValueError(f"Stock insuficiente para {product.name}. Disponible: {product.stock}")
-                    
-                    # Deduct stock
-                    product.stock -= quantity
-                    product.save()
-                    
-                    # Create SaleItem
-                    SaleItem.objects.create(
-                        sale=sale,
-                        product=product,
-                        quantity=quantity,
-                        price=price
-                    )
-                    
-                    total_amount += price * quantity
-                
-                sale.total_amount = total_amount
-                sale.save()
-                
-            return JsonResponse({'success': True, 'sale_id': sale.receipt_number})
+            idempotency_key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+            sale, replayed = submit_sale(
+                request.user, items,
+                register=data.get('register') or DEFAULT_PREFIX,
+                idempotency_key=idempotency_key,
+            )
+
+            return JsonResponse({'success': True, 'sale_id': sale.receipt_number, 'replayed': replayed})
             
         except ValueError as e:
             return JsonResponse({'success': False, 'error': str(e)})
@@ -188,6 +213,27 @@ def create_sale(request):
             
     return JsonResponse({'success': False, 'error': 'Método no permitido.'})
 
+SYNC_BATCH_LIMIT = 100
+
+@login_required
+def sync_sales(request):
+    """Commit sales that an offline register queued locally, in one request."""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Método no permitido.'})
+
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Datos inválidos.'})
+
+    queued_sales = data.get('sales', [])
+    if (not isinstance(queued_sales, list) or len(queued_sales) > SYNC_BATCH_LIMIT
+            or not all(isinstance(queued, dict) for queued in queued_sales)):
+        return JsonResponse({'success': False, 'error': f'Envíe entre 0 y {SYNC_BATCH_LIMIT} ventas por lote.'})
+
+    results = submit_sale_batch(request.user, queued_sales)
+    return JsonResponse({'success': True, 'results': results})
+
 class ReceiptView(LoginRequiredMixin, DetailView):
     model = Sale
     template_name = 'sales/receipt.html'
@@ -216,94 +262,51 @@ class ImportProductsView(LoginRequiredMixin, AdminRequiredMixin, TemplateView):
 
         excel_file = request.FILES['excel_file']
         
-        if not excel_file.name.endswith('.xlsx'):
-            messages.error(request, 'El archivo debe ser un Excel (.xlsx).')
+        if file_format(excel_file.name) is None:
+            messages.error(request, 'El archivo debe ser un Excel (.xlsx) o CSV (.csv).')
             return redirect('import_products')
 
-        try:
-            import openpyxl
-            wb = openpyxl.load_workbook(excel_file)
-            ws = wb.active
+        # Large files would outlive the proxy timeout; import in the background.
+        job = ImportJob.objects.create(file=excel_file, user=request.user)
+        enqueue_import(job)
+        return redirect('import_job', pk=job.pk)
 
-            # Get headers
-            headers = [cell.value for cell in ws[1]]
-            
-            # Map headers to expected fields (case insensitive)
-            header_map = {}
-            for i, header in enumerate(headers):
-                if header:
-                    header_lower = str(header).lower().strip()
-                    if 'nombre' in header_lower: header_map['name'] = i
-                    elif 'categor' in header_lower: header_map['category'] = i
-                    elif 'precio' in header_lower: header_map['price'] = i
-                    elif 'costo' in header_lower: header_map['cost'] = i
-                    elif 'stock' in header_lower: header_map['stock'] = i
-                    elif 'código' in header_lower or 'codigo' in header_lower or 'barcode' in header_lower: header_map['barcode'] = i
-
-            # Validate required fields
-            required_fields = ['name', 'price', 'cost']
-            missing_fields = [field for field in required_fields if field not in header_map]
-            
-            if missing_fields:
-                messages.error(request, f'Faltan columnas obligatorias: {", ".join(missing_fields)}')
-                return redirect('import_products')
-
-            products_created = 0
-            products_updated = 0
-            
-            with transaction.atomic():
-                for row in ws.iter_rows(min_row=2, values_only=True):
-                    if not row[header_map['name']]: # Skip empty rows
-                        continue
-
-                    # Extract values
-                    name = row[header_map['name']]
-                    price = row[header_map['price']]
-                    cost = row[header_map['cost']]
-                    
-                    category_name = row[header_map['category']] if 'category' in header_map and row[header_map['category']] else None
-                    stock = row[header_map['stock']] if 'stock' in header_map and row[header_map['stock']] is not None else 0
-                    barcode = str(row[header_map['barcode']]) if 'barcode' in header_map and row[header_map['barcode']] else None
-
-                    # Get or create category
-                    category = None
-                    if category_name:
-                        category, _ = Category.objects.get_or_create(name=category_name)
-
-                    # Check if product exists by barcode (if provided) or name
-                    product = None
-                    if barcode:
-                        product = Product.objects.filter(barcode=barcode).first()
-                    
-                    if not product:
-                        product = Product.objects.filter(name=name).first()
-
-                    if product:
-                        # Update existing
-                        product.name = name
-                        product.category = category
-                        product.price = price
-                        product.cost = cost
-                        product.stock = stock # Optional: maybe add to stock instead of replace? For now replace.
-                        if barcode: product.barcode = barcode
-                        product.save()
-                        products_updated += 1
-                    else:
-                        # Create new
-                        Product.objects.create(
-                            name=name,
-                            category=category,
-                            price=price,
-                            cost=cost,
-                            stock=stock,
-                            barcode=barcode
-                        )
-                        products_created += 1
-
-            messages.success(request, f'Importación completada: {products_created} creados, {products_updated} actualizados.')
-            return redirect('product_list')
+@login_required
+def export_products_csv(request):
+    """The whole catalog as a streamed CSV file that ImportProductsView accepts back."""
+    if not is_admin(request):
+        return JsonResponse({'error': 'No autorizado.'}, status=403)
+    response = StreamingHttpResponse(iter_products_csv(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="productos-{timezone.localdate():%Y%m%d}.csv"'
+    return response
+
+class ImportJobView(LoginRequiredMixin, AdminRequiredMixin, DetailView):
+    model = ImportJob
+    template_name = 'sales/import_job.html'
+    context_object_name = 'job'
+
+    def get_object(self, queryset=None):
+        fail_orphaned_jobs(ImportJob.objects.filter(pk=self.kwargs['pk']))
+        return super().get_object(queryset)
 
-        except Exception as e:
-            messages.error(request, f'Error al procesar el archivo: {str(e)}')
-            return redirect('import_products')
+@login_required
+def import_job_status(request, pk):
+    """Polled by the import page while the job runs."""
+    if not is_admin(request):
+        return JsonResponse({'error': 'No autorizado.'}, status=403)
+    fail_orphaned_jobs(ImportJob.objects.filter(pk=pk))
+    job = get_object_or_404(ImportJob, pk=pk)
+    return JsonResponse({
+        'id': job.pk,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'total_rows': job.total_rows,
+        'rows_processed': job.rows_processed,
+        'created': job.created,
+        'updated': job.updated,
+        'error_count': job.error_count,
+        'errors': job.errors[:10],
+        'eta_seconds': job.eta_seconds(),
+        'message': job.message,
+    })
 
@@ -0,0 +1,16 @@
+from django.utils.functional import SimpleLazyObject
+
+from .roles import is_admin, is_salesperson
+
+
+def roles(request):
+    """
+    is_admin and is_salesperson for every template. Both are lazy and come
+    from the memoized roles, so pages that never check them cost nothing.
+    """
+    if not hasattr(request, 'user'):
+        return {}
+    return {
+        'is_admin': SimpleLazyObject(lambda: is_admin(request)),
+        'is_salesperson': SimpleLazyObject(lambda: is_salesperson(request)),
+    }
@@ -0,0 +1,72 @@
+import time
+
+from django.contrib.auth.mixins import UserPassesTestMixin
+
+from sales.cache import bump, generation
+
+ADMIN = 'Admin'
+SALESPERSON = 'Salesperson'
+
+SESSION_KEY = '_user_roles'
+# Bumped whenever group membership or a group changes; session entries
+# resolved under an older generation are reloaded.
+GENERATION_KEY = 'user_roles:generation'
+# The generation lives in the per-process cache, so a change made through
+# one worker is not seen by the others; sessions reload their roles at
+# least this often regardless.
+SESSION_ROLES_MAX_AGE = 5 * 60
+
+
+def roles_generation():
+    return generation(GENERATION_KEY)
+
+
+def invalidate_roles():
+    bump(GENERATION_KEY)
+
+
+def user_roles(request):
+    """
+    Names of the groups the request's user belongs to.
+
+    Loaded at most once per request, and reused from the session across
+    requests until group membership changes, instead of querying the
+    groups on every permission check.
+    """
+    roles = getattr(request, '_user_roles', None)
+    if roles is not None:
+        return roles
+
+    user = request.user
+    if not user.is_authenticated:
+        roles = frozenset()
+    else:
+        generation = roles_generation()
+        entry = request.session.get(SESSION_KEY)
+        if (entry and entry['user'] == user.pk and entry['generation'] == generation
+                and time.time() - entry['loaded_at'] < SESSION_ROLES_MAX_AGE):
+            roles = frozenset(entry['roles'])
+        else:
+            roles = frozenset(user.groups.values_list('name', flat=True))
+            request.session[SESSION_KEY] = {
+                'user': user.pk,
+                'generation': generation,
+                'roles': sorted(roles),
+                'loaded_at': time.time(),
+            }
+    request._user_roles = roles
+    return roles
+
+
+def is_admin(request):
+    # is_superuser comes with the user row, which is loaded on every request.
+    return request.user.is_superuser or ADMIN in user_roles(request)
+
+
+def is_salesperson(request):
+    return SALESPERSON in user_roles(request)
+
+
+class AdminRequiredMixin(UserPassesTestMixin):
+    def test_func(self):
+        return is_admin(self.request)
@@ -1,15 +1,12 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.views import LoginView
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.models import User
 from .forms import UserForm
-
-class AdminRequiredMixin(UserPassesTestMixin):
-    def test_func(self):
-        return self.request.user.is_superuser or self.request.user.groups.filter(name='Admin').exists()
+from .roles import AdminRequiredMixin
 
 class CustomLoginView(LoginView):
     template_name = 'users/login.html'
@@ -20,18 +17,13 @@ class CustomLoginView(LoginView):
 
 @login_required
 def dashboard(request):
-    user = request.user
-    is_admin = user.groups.filter(name='Admin').exists() or user.is_superuser
-    is_salesperson = user.groups.filter(name='Salesperson').exists()
-    
-    context = {
-        'is_admin': is_admin,
-        'is_salesperson': is_salesperson,
-    }
-    return render(request, 'users/dashboard.html', context)
+    # is_admin and is_salesperson come from the roles context processor.
+    return render(request, 'users/dashboard.html')
 
 class UserListView(LoginRequiredMixin, AdminRequiredMixin, ListView):
     model = User
+    # The list shows each user's role.
+    queryset = User.objects.prefetch_related('groups')
     template_name = 'users/user_list.html'
     context_object_name = 'users'
     ordering = ['username']